@@ -0,0 +1,4 @@
+from nem12_tools.cli import main
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,29 @@
+import contextlib
 import datetime
+import pathlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from typing import IO
 
 import click
 
-from nem12_tools.generators import nem12
+from nem12_tools.comparators.nem12 import Change
+from nem12_tools.comparators.nem12 import diff as diff_nem12
+from nem12_tools.generators import fleet as fleet_generator
+from nem12_tools.generators import nem12, profiles, shards, spool, sqlite
+from nem12_tools.parsers.index import write_index
+from nem12_tools.parsers.nem12 import FileFormat
 from nem12_tools.parsers.nmid import from_nmidiscovery
+from nem12_tools.validators.nem12 import validate as validate_nem12
 
 
-@click.command()
+@click.group()
+def main() -> None:
+    """
+    Tools for generating and checking NEM12 files.
+    """
+
+
+@main.command()
 @click.argument("nmi_discovery_file", type=click.File("r"))
 @click.argument("output_file", type=click.File("wb"))
 @click.option(
@@ -33,6 +49,50 @@ from nem12_tools.parsers.nmid import from_nmidiscovery
     default="5",
     help="The interval length in minutes. Default: 5",
 )
+@click.option(
+    "--format",
+    "file_format",
+    type=click.Choice([file_format.value for file_format in FileFormat]),
+    default=FileFormat.ASEXML.value,
+    help="asexml: a MeterDataNotification, csv: a bare NEM12 CSV file. Default: asexml",
+)
+@click.option(
+    "--index",
+    is_flag=True,
+    help="Also write a sidecar index (OUTPUT_FILE.idx) of the byte offsets of each row.",
+)
+@click.option("--seed", type=int, help="Seed for reproducible reads. Default: random")
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of workers generating reads in parallel. Default: 1",
+)
+@click.option(
+    "--threads",
+    is_flag=True,
+    help="Run --workers as threads in this process rather than separate processes.",
+)
+@click.option(
+    "--profile",
+    "profile_specs",
+    multiple=True,
+    metavar="KEY=PROFILE",
+    help="Shape the reads of registers matching a suffix (E1), data stream (B) or unit of "
+    "measure (KWH) with consumption, solar, flat, flat:<kW> or a CSV template path. Repeatable.",
+)
+@click.option(
+    "--sqlite",
+    "sqlite_path",
+    type=click.Path(dir_okay=False, path_type=pathlib.Path),
+    help="Also load the generated reads into this SQLite database.",
+)
+@click.option(
+    "--sqlite-layout",
+    type=click.Choice([layout.value for layout in sqlite.Layout]),
+    default=sqlite.Layout.NORMALISED.value,
+    help="normalised: a row per interval read, wide: a row per day. Default: normalised",
+)
 def generate(
     nmi_discovery_file: IO[str],
     output_file: IO[bytes],
@@ -40,7 +100,17 @@ def generate(
     to_date: datetime.datetime | None,
     frmp: str | None,
     interval: str,
+    file_format: str,
+    index: bool,
+    seed: int | None,
+    workers: int,
+    threads: bool,
+    profile_specs: tuple[str, ...],
+    sqlite_path: pathlib.Path | None,
+    sqlite_layout: str,
 ) -> None:
+    if index and output_file.name == "-":
+        raise click.UsageError("--index requires OUTPUT_FILE to be a file")
     if not from_date:
         from_date = datetime.datetime.now()
     if not to_date:
@@ -49,10 +119,307 @@ def generate(
     if frmp:
         meter_config.role_frmp = frmp
     interval_length = nem12.IntervalLength(int(interval))
-    meter_data_transaction = nem12.generate_nem12(
-        meter_config, from_date.date(), to_date.date(), interval_length
+    register_profiles = _parse_profiles(profile_specs)
+    with contextlib.ExitStack() as stack:
+        executor = None
+        if workers > 1:
+            pool = ThreadPoolExecutor if threads else ProcessPoolExecutor
+            executor = stack.enter_context(pool(max_workers=workers))
+        sinks = _sqlite_sinks(stack, sqlite_path, sqlite_layout)
+        if file_format == FileFormat.CSV:
+            nem12.generate_nem12_csv(
+                meter_config,
+                output_file,
+                from_date.date(),
+                to_date.date(),
+                interval_length,
+                seed=seed,
+                executor=executor,
+                sinks=sinks,
+                register_profiles=register_profiles,
+            )
+        else:
+            meter_data_transaction = nem12.generate_nem12(
+                meter_config,
+                from_date.date(),
+                to_date.date(),
+                interval_length,
+                seed=seed,
+                executor=executor,
+                sinks=sinks,
+                register_profiles=register_profiles,
+            )
+            meter_data_transaction.tree.write(
+                output_file, pretty_print=True, xml_declaration=True, encoding="utf-8"
+            )
+    if index:
+        output_file.flush()
+        write_index(output_file.name)
+    click.echo("NEM12 file generated successfully")
+
+
+@main.command()
+@click.argument("nmi_discovery_files", nargs=-1, required=True, type=click.File("r"))
+@click.argument(
+    "output_dir", type=click.Path(file_okay=False, writable=True, path_type=pathlib.Path)
+)
+@click.option(
+    "--from",
+    "from_date",
+    type=click.DateTime(),
+    help="Date to generate reads from. Default: today",
+)
+@click.option(
+    "--to",
+    "to_date",
+    type=click.DateTime(),
+    help="Date to generate reads to. Default: today",
+)
+@click.option(
+    "--interval",
+    type=click.Choice(["5", "15", "30"]),
+    default="5",
+    help="The interval length in minutes. Default: 5",
+)
+@click.option("--seed", type=int, help="Seed for reproducible reads. Default: random")
+@click.option(
+    "--shard",
+    help="Only generate NMIs in shard i of n (e.g. 2/4) and write a manifest. Requires --seed.",
+)
+@click.option(
+    "--profile",
+    "profile_specs",
+    multiple=True,
+    metavar="KEY=PROFILE",
+    help="Shape the reads of registers matching a suffix (E1), data stream (B) or unit of "
+    "measure (KWH) with consumption, solar, flat, flat:<kW> or a CSV template path. Repeatable.",
+)
+@click.option(
+    "--sqlite",
+    "sqlite_path",
+    type=click.Path(dir_okay=False, path_type=pathlib.Path),
+    help="Also load the generated reads into this SQLite database.",
+)
+@click.option(
+    "--sqlite-layout",
+    type=click.Choice([layout.value for layout in sqlite.Layout]),
+    default=sqlite.Layout.NORMALISED.value,
+    help="normalised: a row per interval read, wide: a row per day. Default: normalised",
+)
+def fleet(
+    nmi_discovery_files: tuple[IO[str], ...],
+    output_dir: pathlib.Path,
+    from_date: datetime.datetime | None,
+    to_date: datetime.datetime | None,
+    interval: str,
+    seed: int | None,
+    shard: str | None,
+    profile_specs: tuple[str, ...],
+    sqlite_path: pathlib.Path | None,
+    sqlite_layout: str,
+) -> None:
+    """
+    Generate a NEM12 file per NMI with reads correlated across the whole fleet.
+    """
+    if not from_date:
+        from_date = datetime.datetime.now()
+    if not to_date:
+        to_date = datetime.datetime.now()
+    meter_points = [from_nmidiscovery(file.read()) for file in nmi_discovery_files]
+    register_profiles = _parse_profiles(profile_specs)
+    manifest = None
+    if shard:
+        # Every shard must share the fleet's weather, which is derived from the seed.
+        if seed is None:
+            raise click.UsageError("--shard requires --seed")
+        try:
+            selected = shards.Shard.parse(shard)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint="--shard") from None
+        meter_points = shards.select(meter_points, selected)
+        manifest = shards.Manifest(
+            shard=selected,
+            shards=selected.count,
+            seed=seed,
+            start=from_date.date(),
+            end=to_date.date(),
+            interval=nem12.IntervalLength(int(interval)),
+        )
+    output_dir.mkdir(parents=True, exist_ok=True)
+    with contextlib.ExitStack() as stack:
+        notifications = fleet_generator.generate_fleet(
+            meter_points,
+            from_date.date(),
+            to_date.date(),
+            nem12.IntervalLength(int(interval)),
+            seed=seed,
+            sinks=_sqlite_sinks(stack, sqlite_path, sqlite_layout),
+            register_profiles=register_profiles,
+        )
+        for meter_point, notification in notifications:
+            output_file = output_dir / f"{meter_point.nmi}.xml"
+            notification.write_xml(str(output_file))
+            if manifest:
+                manifest.files.append(
+                    shards.manifest_file(output_file, output_dir, [meter_point.nmi])
+                )
+    if manifest and manifest.shard:
+        manifest.write(output_dir / manifest.shard.manifest_name())
+    click.echo(f"{len(meter_points)} NEM12 file(s) generated successfully")
+
+
+@main.command()
+@click.argument("manifests", nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.argument("output_dir", type=click.Path(file_okay=False, path_type=pathlib.Path))
+@click.option(
+    "--max-bytes",
+    type=click.IntRange(min=1),
+    help="Repack the shard outputs into messages of at most this many bytes.",
+)
+def merge(manifests: tuple[str, ...], output_dir: pathlib.Path, max_bytes: int | None) -> None:
+    """
+    Verify a complete set of shard manifests and combine them into OUTPUT_DIR/manifest.json.
+    """
+    try:
+        merged = shards.merge_manifests(manifests, output_dir, max_bytes=max_bytes)
+    except shards.ManifestError as e:
+        for problem in e.problems:
+            click.echo(problem, err=True)
+        raise click.exceptions.Exit(1) from None
+    nmis = sum(len(file.nmis) for file in merged.files)
+    click.echo(f"Merged {merged.shards} shard(s): {nmis} NMI(s) in {len(merged.files)} file(s)")
+
+
+@main.command()
+@click.argument("nmi_discovery_files", nargs=-1, required=True, type=click.File("r"))
+@click.argument("spool_dir", type=click.Path(file_okay=False, path_type=pathlib.Path))
+@click.option(
+    "--from",
+    "from_date",
+    type=click.DateTime(),
+    help="Date to generate reads from. Default: today",
+)
+@click.option(
+    "--to",
+    "to_date",
+    type=click.DateTime(),
+    help="Date to generate reads to. Default: today",
+)
+@click.option(
+    "--interval",
+    type=click.Choice(["5", "15", "30"]),
+    default="5",
+    help="The interval length in minutes. Default: 5",
+)
+@click.option("--rate", type=click.FloatRange(min=0, min_open=True), help="Target files/sec.")
+@click.option("--mb-rate", type=click.FloatRange(min=0, min_open=True), help="Target MB/sec.")
+@click.option("--count", type=click.IntRange(min=1), help="Stop after this many files.")
+@click.option("--duration", type=click.FloatRange(min=0), help="Stop after this many seconds.")
+@click.option(
+    "--prefetch",
+    type=click.IntRange(min=1),
+    default=8,
+    help="Number of files generated ahead of the schedule. Default: 8",
+)
+@click.option("--seed", type=int, help="Seed for reproducible reads. Default: random")
+def emit(
+    nmi_discovery_files: tuple[IO[str], ...],
+    spool_dir: pathlib.Path,
+    from_date: datetime.datetime | None,
+    to_date: datetime.datetime | None,
+    interval: str,
+    rate: float | None,
+    mb_rate: float | None,
+    count: int | None,
+    duration: float | None,
+    prefetch: int,
+    seed: int | None,
+) -> None:
+    """
+    Continuously write NEM12 files into SPOOL_DIR at a target rate, simulating MDP delivery.
+    """
+    if count is None and duration is None:
+        raise click.UsageError("One of --count or --duration is required")
+    if not from_date:
+        from_date = datetime.datetime.now()
+    if not to_date:
+        to_date = datetime.datetime.now()
+    stats = spool.emit(
+        [from_nmidiscovery(file.read()) for file in nmi_discovery_files],
+        spool_dir,
+        from_date.date(),
+        to_date.date(),
+        nem12.IntervalLength(int(interval)),
+        files_per_second=rate,
+        megabytes_per_second=mb_rate,
+        count=count,
+        duration=duration,
+        prefetch=prefetch,
+        seed=seed,
+        report=click.echo,
     )
-    meter_data_transaction.tree.write(
-        output_file, pretty_print=True, xml_declaration=True, encoding="utf-8"
+    click.echo(stats)
+
+
+@main.command()
+@click.argument("files", nargs=-1, required=True, type=click.File("rb"))
+def validate(files: tuple[IO[bytes], ...]) -> None:
+    """
+    Check that NEM12 files (aseXML or bare CSV) are internally consistent.
+    """
+    failed = False
+    for file in files:
+        for violation in validate_nem12(file):
+            failed = True
+            click.echo(f"{file.name}:{violation.line}: {violation.message}")
+    if failed:
+        raise click.exceptions.Exit(1)
+    click.echo(f"{len(files)} file(s) valid")
+
+
+@main.command()
+@click.argument("old_file", type=click.File("rb"))
+@click.argument("new_file", type=click.File("rb"))
+@click.option("--summary", is_flag=True, help="Only report the number of differing rows.")
+def diff(old_file: IO[bytes], new_file: IO[bytes], summary: bool) -> None:
+    """
+    Report 300 rows added, removed or changed between two NEM12 files.
+    """
+    counts = dict.fromkeys(Change, 0)
+    for row in diff_nem12(old_file, new_file):
+        counts[row.change] += 1
+        if summary:
+            continue
+        click.echo(f"{row.change} {row.nmi} {row.register_suffix} {row.read_date}")
+        if row.old_quality != row.new_quality:
+            click.echo(f"    quality: {row.old_quality} -> {row.new_quality}")
+        for delta in row.deltas:
+            change = "" if delta.delta is None else f" ({delta.delta:+})"
+            click.echo(f"    interval {delta.interval}: {delta.old} -> {delta.new}{change}")
+    click.echo(
+        f"{counts[Change.ADDED]} added, {counts[Change.REMOVED]} removed, "
+        f"{counts[Change.CHANGED]} changed"
     )
-    click.echo("NEM12 file generated successfully")
+    if any(counts.values()):
+        raise click.exceptions.Exit(1)
+
+
+def _sqlite_sinks(
+    stack: contextlib.ExitStack, path: pathlib.Path | None, layout: str
+) -> list[nem12.Nem12Sink]:
+    if path is None:
+        return []
+    return [stack.enter_context(sqlite.SqliteSink(path, sqlite.Layout(layout)))]
+
+
+def _parse_profiles(specs: tuple[str, ...]) -> dict[str, profiles.ProfileProvider]:
+    register_profiles = {}
+    for spec in specs:
+        key, separator, profile = spec.partition("=")
+        if not separator or not key:
+            raise click.BadParameter(f"{spec!r} is not KEY=PROFILE", param_hint="--profile")
+        try:
+            register_profiles[key.upper()] = profiles.parse_profile(profile)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint="--profile") from None
+    return register_profiles
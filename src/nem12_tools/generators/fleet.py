@@ -0,0 +1,253 @@
+"""
+Generate correlated reads for a fleet of meter points.
+
+Every read is the product of a time-of-day shape and a daily (weather) factor shared by the
+whole fleet, a per-NMI scale, and per-interval noise. The shared factors are computed once as
+a single (days x intervals) block, and each register's reads are derived from that block with
+whole-block operations rather than a random draw per value, so the fleet has coincident peaks
+and large fleets are cheap to generate.
+
+Registers are shaped by the provider ``profiles.select_profile`` picks for them. Registers
+left to the default ``ConsumptionProfile`` use the fleet's demand described above. Other
+registers left to the default providers (solar export for ``B`` registers) take their
+provider's reads and apply the same daily factor, per-NMI scale and per-interval noise, so they
+vary together across the fleet too. Providers chosen by the caller are used unchanged.
+
+Each NMI's reads depend only on the seed, the date range and the NMI itself, not on which
+other meter points are in the fleet or their order.
+"""
+
+import array
+import dataclasses
+import datetime
+import itertools
+import math
+import random
+import secrets
+import zoneinfo
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+
+from nem12_tools.parsers.nmid import MeterPoint, Register
+
+from . import nem12
+from . import notifications as mdmt
+from . import profiles
+
+#: Day-to-day persistence of the shared weather factor.
+WEATHER_PERSISTENCE = 0.7
+#: Spread of the per-NMI scale applied to the shared shape.
+NMI_SCALE_SIGMA = 0.35
+#: Spread of the per-interval noise.
+NOISE_SIGMA = 0.3
+#: Number of distinct starting points into the shared noise block.
+NOISE_SPAN = 10_007
+
+
+@dataclasses.dataclass(frozen=True)
+class FleetFactors:
+    """
+    The (days x intervals) block of demand, in kW, shared by every meter point in a fleet, and
+    the daily factor (weather and weekends) it was scaled by.
+    """
+
+    start: datetime.date
+    interval: nem12.IntervalLength
+    seed: int
+    shared: array.array
+    daily: array.array
+    noise: array.array
+
+    @classmethod
+    def generate(
+        cls,
+        start: datetime.date,
+        end: datetime.date,
+        interval: nem12.IntervalLength,
+        seed: int,
+    ) -> "FleetFactors":
+        rng = random.Random(f"{seed}:fleet:{start}:{end}:{interval.value}")
+        intervals = interval.intervals()
+        shape = [_time_of_day_demand((i + 0.5) * interval.value / 60) for i in range(intervals)]
+
+        shared = array.array("d")
+        daily = array.array("d")
+        weather = 1.0
+        for day in range((end - start).days + 1):
+            weather = WEATHER_PERSISTENCE * weather + (
+                1 - WEATHER_PERSISTENCE
+            ) * rng.lognormvariate(0, 0.5)
+            weekday = (start + datetime.timedelta(days=day)).weekday()
+            factor = weather * (1.1 if weekday >= 5 else 1.0)
+            daily.append(factor)
+            shared.extend([demand * factor for demand in shape])
+
+        # Each register multiplies two windows of this block, so its noise is lognormal with
+        # NOISE_SIGMA overall.
+        sigma = NOISE_SIGMA / math.sqrt(2)
+        noise = array.array(
+            "d", [rng.lognormvariate(0, sigma) for _ in range(len(shared) + NOISE_SPAN)]
+        )
+        return cls(
+            start=start,
+            interval=interval,
+            seed=seed,
+            shared=shared,
+            daily=daily,
+            noise=noise,
+        )
+
+    @property
+    def days(self) -> int:
+        return len(self.shared) // self.interval.intervals()
+
+    def register_reads(self, nmi: str, register_suffix: str) -> array.array:
+        """
+        Scaled integer consumption reads (see ``nem12.READ_SCALE``) for one register of an NMI.
+        """
+        # Convert average kW over the interval to kWh at the NEM12 resolution.
+        scale = self._nmi_scale(nmi) * self.interval.value / 60 * nem12.READ_SCALE
+        first, second = self._noise(nmi, register_suffix)
+        return array.array(
+            "q",
+            [round(demand * a * b * scale) for demand, a, b in zip(self.shared, first, second)],
+        )
+
+    def modulate(self, nmi: str, register_suffix: str, reads: array.array) -> array.array:
+        """
+        Apply the daily factor, per-NMI scale and noise of the fleet to reads from a profile
+        provider for one register of an NMI.
+        """
+        scale = self._nmi_scale(nmi)
+        first, second = self._noise(nmi, register_suffix)
+        daily = itertools.chain.from_iterable(
+            itertools.repeat(factor, self.interval.intervals()) for factor in self.daily
+        )
+        return array.array(
+            "q",
+            [
+                round(read * factor * a * b * scale)
+                for read, factor, a, b in zip(reads, daily, first, second)
+            ],
+        )
+
+    def _nmi_scale(self, nmi: str) -> float:
+        return random.Random(f"{self.seed}:{nmi}").lognormvariate(0, NMI_SCALE_SIGMA)
+
+    def _noise(self, nmi: str, register_suffix: str) -> tuple[array.array, array.array]:
+        """
+        The two windows of the noise block applied to one register of an NMI.
+        """
+        offsets = random.Random(f"{self.seed}:{nmi}:{register_suffix}")
+        size = len(self.shared)
+        first, second = offsets.randrange(NOISE_SPAN), offsets.randrange(NOISE_SPAN)
+        return self.noise[first : first + size], self.noise[second : second + size]
+
+
+def produce_fleet_data(
+    meter_points: Iterable[MeterPoint],
+    start: datetime.date,
+    end: datetime.date,
+    interval: nem12.IntervalLength,
+    generation_time: datetime.datetime,
+    *,
+    seed: int | None = None,
+    register_profiles: Mapping[str, profiles.ProfileProvider] | None = None,
+) -> Iterator[tuple[MeterPoint, nem12.Nem12Data]]:
+    """
+    Generate NEM12 data for each meter point from ``start`` to ``end`` inclusive, one at a time.
+
+    Each register's provider is chosen by ``profiles.select_profile`` from
+    ``register_profiles``. Registers whose provider is the default ``ConsumptionProfile()`` use
+    the fleet's own correlated demand, other default providers are varied with the fleet, and
+    providers from ``register_profiles`` are used unchanged.
+    """
+    if start > end:
+        raise ValueError("Start date must be before end date")
+    if seed is None:
+        seed = secrets.randbits(64)
+    factors = FleetFactors.generate(start, end, interval, seed)
+    for meter_point in meter_points:
+        register_reads = [
+            _register_reads(factors, meter_point.nmi, register, register_profiles)
+            for meter in meter_point.meters
+            for register in meter.registers
+        ]
+        yield (
+            meter_point,
+            nem12.assemble_nem12_data(
+                meter_point, start, interval, generation_time, register_reads
+            ),
+        )
+
+
+def generate_fleet(
+    meter_points: Iterable[MeterPoint],
+    start: datetime.date,
+    end: datetime.date,
+    interval: nem12.IntervalLength = nem12.IntervalLength.FIVE_MINUTES,
+    *,
+    seed: int | None = None,
+    sinks: Sequence[nem12.Nem12Sink] = (),
+    register_profiles: Mapping[str, profiles.ProfileProvider] | None = None,
+) -> Iterator[tuple[MeterPoint, mdmt.MeterDataNotification]]:
+    """
+    Generate a MeterDataNotification for each meter point of a correlated fleet.
+    """
+    now_tz = datetime.datetime.now(tz=zoneinfo.ZoneInfo("Etc/GMT-10"))
+    run_id = nem12.new_run_id()
+    fleet_data = produce_fleet_data(
+        meter_points,
+        start,
+        end,
+        interval,
+        now_tz,
+        seed=seed,
+        register_profiles=register_profiles,
+    )
+    for number, (meter_point, nem_12_data) in enumerate(fleet_data):
+        for sink in sinks:
+            sink.write(nem_12_data)
+        message_id = nem12.new_message_id(run_id, number)
+        yield (
+            meter_point,
+            nem12.build_notification(meter_point, nem_12_data, now_tz, message_id=message_id),
+        )
+
+
+def _register_reads(
+    factors: FleetFactors,
+    nmi: str,
+    register: Register,
+    register_profiles: Mapping[str, profiles.ProfileProvider] | None,
+) -> array.array:
+    provider = profiles.select_profile(register, register_profiles)
+    if provider == profiles.ConsumptionProfile():
+        return factors.register_reads(nmi, register.suffix)
+    request = profiles.ProfileRequest(
+        seed=factors.seed,
+        nmi=nmi,
+        register_suffix=register.suffix,
+        uom=register.uom,
+        start=factors.start,
+        days=factors.days,
+        intervals=factors.interval.intervals(),
+    )
+    reads = provider.reads(request)
+    if len(reads) != len(factors.shared):
+        raise ValueError(
+            f"{type(provider).__name__} returned {len(reads)} reads, expected {len(factors.shared)}"
+        )
+    # select_profile returns the DEFAULT_PROFILES instance itself unless the caller chose one.
+    if provider is profiles.select_profile(register):
+        return factors.modulate(nmi, register.suffix, reads)
+    return reads
+
+
+def _time_of_day_demand(hour: float) -> float:
+    """
+    Average household demand in kW at the given hour: a base load, a morning peak at about
+    7:30am and a larger evening peak at about 7:30pm.
+    """
+    morning = 0.6 * math.exp(-(((hour - 7.5) / 1.2) ** 2))
+    evening = 1.2 * math.exp(-(((hour - 19.5) / 2.0) ** 2))
+    return 0.25 + morning + evening
@@ -1,18 +1,31 @@
+import array
 import csv
 import datetime
 import enum
 import io
-import random
+import itertools
+import secrets
+import uuid
 import zoneinfo
 from abc import ABC, abstractmethod
+from concurrent.futures import Executor
 from decimal import Decimal
-from typing import Sequence
+from typing import IO, Iterator, Mapping, Sequence, overload
 
-from pydantic import BaseModel, Field, field_serializer
+from pydantic import BaseModel, ConfigDict, Field, field_serializer
 
 from nem12_tools.parsers.nmid import MeterPoint
 
 from . import notifications as mdmt
+from . import profiles
+from .reads import READ_SCALE, format_read
+
+
+#: Number of days of reads for a single register generated by each task.
+CHUNK_DAYS = 31
+
+#: Approximate size in bytes of each write when streaming NEM12 CSV to a file.
+CSV_BUFFER_SIZE = 1024 * 1024
 
 
 @enum.unique
@@ -139,6 +152,111 @@ class IntervalData(RowProducer, BaseModel):
         )
 
 
+class IntervalBlock(Sequence[IntervalData]):
+    """
+    Interval reads for one register over a contiguous range of read dates.
+
+    The reads for every day are held in a single ``array`` of scaled integers rather than a
+    ``Decimal`` per value. Indexing the block materialises the ``IntervalData`` for one day,
+    while ``as_rows`` formats the 300 rows directly from the integers.
+    """
+
+    __slots__ = (
+        "start",
+        "intervals",
+        "values",
+        "quality_method",
+        "last_updated",
+        "msats_load_time",
+    )
+
+    def __init__(
+        self,
+        start: datetime.date,
+        intervals: int,
+        values: array.array,
+        quality_method: QualityMethod,
+        last_updated: datetime.datetime,
+        msats_load_time: datetime.datetime,
+    ):
+        if len(values) % intervals:
+            raise ValueError("Number of reads must be a multiple of the intervals per day")
+        self.start = start
+        self.intervals = intervals
+        self.values = values
+        self.quality_method = quality_method
+        self.last_updated = last_updated
+        self.msats_load_time = msats_load_time
+
+    def __len__(self) -> int:
+        return len(self.values) // self.intervals
+
+    @overload
+    def __getitem__(self, index: int) -> IntervalData: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[IntervalData]: ...
+
+    def __getitem__(self, index: int | slice) -> IntervalData | list[IntervalData]:
+        if isinstance(index, slice):
+            return [self[day] for day in range(*index.indices(len(self)))]
+        day = range(len(self))[index]
+        return IntervalData(
+            read_date=self.read_date(day),
+            read_values=tuple(Decimal(format_read(read)) for read in self.day_reads(day)),
+            quality_method=self.quality_method,
+            last_updated=self.last_updated,
+            msats_load_time=self.msats_load_time,
+        )
+
+    def read_date(self, day: int) -> datetime.date:
+        return self.start + datetime.timedelta(days=day)
+
+    def day_reads(self, day: int) -> array.array:
+        """
+        The scaled integer reads for the given day offset from ``start``.
+        """
+        offset = day * self.intervals
+        return self.values[offset : offset + self.intervals]
+
+    def as_rows(self) -> Iterator[tuple[str, ...]]:
+        trailer = (
+            self.quality_method.value,
+            "",
+            "",
+            self.last_updated.strftime("%Y%m%d%H%M%S"),
+            self.msats_load_time.strftime("%Y%m%d%H%M%S"),
+        )
+        for day in range(len(self)):
+            yield (
+                "300",
+                self.read_date(day).strftime("%Y%m%d"),
+                *map(format_read, self.day_reads(day)),
+                *trailer,
+            )
+
+    def as_csv_lines(self) -> Iterator[str]:
+        """
+        The 300 rows as lines of CSV, equivalent to writing ``as_rows`` with ``csv.writer``.
+
+        Each day's reads are formatted with a single ``%`` operation. Dividing by
+        ``READ_SCALE`` and rounding to 4 places is exact for any read below 10**11 kWh.
+        """
+        reads_format = ",".join(["%.4f"] * self.intervals)
+        trailer = ",".join(
+            (
+                self.quality_method.value,
+                "",
+                "",
+                self.last_updated.strftime("%Y%m%d%H%M%S"),
+                self.msats_load_time.strftime("%Y%m%d%H%M%S"),
+            )
+        )
+        for day in range(len(self)):
+            reads = reads_format % tuple([read / READ_SCALE for read in self.day_reads(day)])
+            yield f"300,{self.read_date(day).strftime('%Y%m%d')},{reads},{trailer}\n"
+
+
 class Terminator(RowProducer, BaseModel):
     indicator: str = "900"
 
@@ -147,51 +265,277 @@ class Terminator(RowProducer, BaseModel):
 
 
 class Nem12Data(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     header: Header
-    read_data: Sequence[tuple[NmiDetails, Sequence[IntervalData]]]
+    read_data: Sequence[tuple[NmiDetails, IntervalBlock]]
     terminator: Terminator
 
+    def rows(self) -> Iterator[tuple[str, ...]]:
+        yield self.header.as_row()
+        for nmi_details, interval_data in self.read_data:
+            yield nmi_details.as_row()
+            yield from interval_data.as_rows()
+        yield self.terminator.as_row()
+
+
+class Nem12Sink(ABC):
+    """
+    A destination for generated NEM12 data, written alongside the MeterDataNotification.
+    """
+
+    @abstractmethod
+    def write(self, nem_12_data: Nem12Data) -> None: ...
+
 
 def generate_nem12(
     meter_point: MeterPoint,
-    start: datetime.date = datetime.date.today(),
-    end: datetime.date = datetime.date.today(),
+    start: datetime.date | None = None,
+    end: datetime.date | None = None,
     interval: IntervalLength = IntervalLength.FIVE_MINUTES,
+    *,
+    seed: int | None = None,
+    executor: Executor | None = None,
+    sinks: Sequence[Nem12Sink] = (),
+    register_profiles: Mapping[str, profiles.ProfileProvider] | None = None,
 ) -> mdmt.MeterDataNotification:
-    if start > end:
-        raise ValueError("Start date must be before end date")
+    """
+    Generate a MeterDataNotification of reads for the meter point from ``start`` to ``end``
+    inclusive, both defaulting to today.
 
+    Generation shares no mutable state between calls, so it is safe to call from several
+    threads at once and to pass a ``ThreadPoolExecutor`` as ``executor``.
+    """
     now_tz = datetime.datetime.now(tz=zoneinfo.ZoneInfo("Etc/GMT-10"))
-    nem_12_data = produce_nem12_data(meter_point, start, end, interval, now_tz)
+    nem_12_data = _generate(
+        meter_point, start, end, interval, now_tz, seed, executor, sinks, register_profiles
+    )
+    return build_notification(meter_point, nem_12_data, now_tz)
 
-    transactions = io.StringIO(newline="")
-    writer = csv.writer(transactions, delimiter=",", lineterminator="\n")
+
+def generate_nem12_csv(
+    meter_point: MeterPoint,
+    output: IO[bytes],
+    start: datetime.date | None = None,
+    end: datetime.date | None = None,
+    interval: IntervalLength = IntervalLength.FIVE_MINUTES,
+    *,
+    seed: int | None = None,
+    executor: Executor | None = None,
+    sinks: Sequence[Nem12Sink] = (),
+    register_profiles: Mapping[str, profiles.ProfileProvider] | None = None,
+) -> None:
+    """
+    Generate reads as for ``generate_nem12``, but write them to ``output`` as a bare NEM12 CSV
+    file rather than wrapping them in a MeterDataNotification.
+    """
+    now_tz = datetime.datetime.now(tz=zoneinfo.ZoneInfo("Etc/GMT-10"))
+    nem_12_data = _generate(
+        meter_point, start, end, interval, now_tz, seed, executor, sinks, register_profiles
+    )
+    write_csv(nem_12_data, output)
+
+
+def write_csv(
+    nem_12_data: Nem12Data, output: IO[bytes], *, buffer_size: int = CSV_BUFFER_SIZE
+) -> None:
+    """
+    Stream the 100 to 900 rows to ``output``, writing in chunks of about ``buffer_size`` bytes.
+
+    The 300 rows are formatted straight from the scaled integer reads (see
+    ``IntervalBlock.as_csv_lines``), so only one chunk of text is held in memory at a time.
+    """
+    chunk: list[str] = []
+    size = 0
+    writer = csv.writer(_ChunkWriter(chunk), delimiter=",", lineterminator="\n")
     writer.writerow(nem_12_data.header.as_row())
     for nmi_details, interval_data in nem_12_data.read_data:
         writer.writerow(nmi_details.as_row())
-        for data in interval_data:
-            writer.writerow(data.as_row())
+        for line in interval_data.as_csv_lines():
+            chunk.append(line)
+            size += len(line)
+            if size >= buffer_size:
+                output.write("".join(chunk).encode("utf-8"))
+                chunk.clear()
+                size = 0
     writer.writerow(nem_12_data.terminator.as_row())
+    output.write("".join(chunk).encode("utf-8"))
 
-    meter_data_file = _create_meterdata_notification(meter_point)
+
+class _ChunkWriter:
+    """
+    Collects the lines ``csv.writer`` writes into a list.
+    """
+
+    def __init__(self, chunk: list[str]):
+        self.write = chunk.append
+
+
+def _generate(
+    meter_point: MeterPoint,
+    start: datetime.date | None,
+    end: datetime.date | None,
+    interval: IntervalLength,
+    generation_time: datetime.datetime,
+    seed: int | None,
+    executor: Executor | None,
+    sinks: Sequence[Nem12Sink],
+    register_profiles: Mapping[str, profiles.ProfileProvider] | None,
+) -> Nem12Data:
+    today = datetime.date.today()
+    start = today if start is None else start
+    end = today if end is None else end
+    if start > end:
+        raise ValueError("Start date must be before end date")
+
+    nem_12_data = produce_nem12_data(
+        meter_point,
+        start,
+        end,
+        interval,
+        generation_time,
+        seed=seed,
+        executor=executor,
+        register_profiles=register_profiles,
+    )
+    for sink in sinks:
+        sink.write(nem_12_data)
+    return nem_12_data
+
+
+def build_notification(
+    meter_point: MeterPoint,
+    nem_12_data: Nem12Data,
+    now_tz: datetime.datetime,
+    *,
+    message_id: str | None = None,
+) -> mdmt.MeterDataNotification:
+    """
+    Wrap generated NEM12 data in a MeterDataNotification addressed to the meter point's FRMP.
+    """
+    transactions = io.StringIO(newline="")
+    writer = csv.writer(transactions, delimiter=",", lineterminator="\n")
+    writer.writerows(nem_12_data.rows())
+    return notification_from_csv(
+        meter_point.role_mdp,
+        meter_point.role_frmp,
+        transactions.getvalue(),
+        now_tz,
+        message_id=message_id,
+    )
+
+
+def notification_from_csv(
+    from_participant: str,
+    to_participant: str,
+    csv_interval_data: str,
+    now_tz: datetime.datetime,
+    *,
+    message_id: str | None = None,
+) -> mdmt.MeterDataNotification:
+    """
+    Wrap NEM12 CSV (100 to 900 rows) in a MeterDataNotification.
+
+    ``message_id`` is used as both the MessageID and the transactionID, and defaults to a new
+    ID from a random run (see ``new_message_id``).
+    """
+    if message_id is None:
+        message_id = new_message_id(new_run_id(), 0)
+    meter_data_file = _create_meterdata_notification(
+        from_participant, to_participant, message_id, now_tz
+    )
     meter_data_file.transactions(
-        transaction_id=f"MTRD_MSG_NEM12_{now_tz.strftime('%Y%m%d%H%M%f')}",
+        transaction_id=message_id,
         transaction_date=now_tz.isoformat(timespec="seconds"),
         transaction_type="MeterDataNotification",
         transaction_schema_version="r25",
-        csv_interval_data=transactions.getvalue(),
+        csv_interval_data=csv_interval_data,
         participant_role="FRMP",
     )
     return meter_data_file
 
 
+def new_run_id() -> str:
+    """
+    A random identifier for a run of notifications, such as a fleet or a merge.
+    """
+    return uuid.uuid4().hex[:12]
+
+
+def new_message_id(run_id: str, sequence: int) -> str:
+    """
+    The ID of notification number ``sequence`` of a run. aseXML limits IDs to 36 characters,
+    which this fills exactly for the first 10^8 notifications of a run.
+    """
+    return f"MTRD_MSG_NEM12_{run_id}_{sequence:08d}"
+
+
 def produce_nem12_data(
     meter_point: MeterPoint,
     start: datetime.date,
     end: datetime.date,
     interval: IntervalLength,
     generation_time: datetime.datetime,
+    *,
+    seed: int | None = None,
+    executor: Executor | None = None,
+    chunk_days: int = CHUNK_DAYS,
+    register_profiles: Mapping[str, profiles.ProfileProvider] | None = None,
+) -> Nem12Data:
+    """
+    Generate reads for every register of the meter point from ``start`` to ``end`` inclusive.
+
+    Each register's reads come from the provider ``profiles.select_profile`` picks for it from
+    ``register_profiles``. The work is split into (register, ``chunk_days``) tasks which run on
+    ``executor`` when one is given. The built-in providers draw each day's reads from a
+    generator seeded by ``seed``, the register and the date, so the same seed produces the
+    same reads regardless of the executor or chunking.
+    """
+    if seed is None:
+        seed = secrets.randbits(64)
+    days = (end - start).days + 1
+    chunk_offsets = range(0, days, chunk_days)
+    registers = [register for meter in meter_point.meters for register in meter.registers]
+    providers = []
+    requests = []
+    for register in registers:
+        provider = profiles.select_profile(register, register_profiles)
+        for offset in chunk_offsets:
+            providers.append(provider)
+            requests.append(
+                profiles.ProfileRequest(
+                    seed=seed,
+                    nmi=meter_point.nmi,
+                    register_suffix=register.suffix,
+                    uom=register.uom,
+                    start=start + datetime.timedelta(days=offset),
+                    days=min(chunk_days, days - offset),
+                    intervals=interval.intervals(),
+                )
+            )
+    # Executor.map yields results in task order, so each register's chunks arrive in sequence.
+    chunks = (executor.map if executor else map)(_generate_reads, providers, requests)
+
+    register_reads = []
+    for _ in registers:
+        values = array.array("q")
+        for chunk in itertools.islice(chunks, len(chunk_offsets)):
+            values.extend(chunk)
+        register_reads.append(values)
+    return assemble_nem12_data(meter_point, start, interval, generation_time, register_reads)
+
+
+def assemble_nem12_data(
+    meter_point: MeterPoint,
+    start: datetime.date,
+    interval: IntervalLength,
+    generation_time: datetime.datetime,
+    register_reads: Sequence[array.array],
 ) -> Nem12Data:
+    """
+    Build NEM12 data from scaled integer reads starting at ``start``, one array per register
+    in the order the meter point lists them.
+    """
     header = Header(
         generation_time=generation_time,
         from_participant=meter_point.role_mdp,
@@ -199,70 +543,59 @@ def produce_nem12_data(
     )
 
     nmi_config = "".join(reg.suffix for meter in meter_point.meters for reg in meter.registers)
+    registers = [(meter, register) for meter in meter_point.meters for register in meter.registers]
+    if len(registers) != len(register_reads):
+        raise ValueError("Expected reads for each register of the meter point")
     read_data = []
-    for meter in meter_point.meters:
-        for register in meter.registers:
-            nmi_details = NmiDetails(
-                nmi=meter_point.nmi,
-                nmi_configuration=nmi_config,
-                register_id=register.register_id,
-                register_suffix=register.suffix,
-                meter_serial_number=meter.serial_number,
-                uom=register.uom,
-                interval_length=interval,
-            )
-            current_date = start
-            interval_data = []
-            while current_date <= end:
-                interval_data.append(
-                    IntervalData(
-                        read_date=current_date,
-                        read_values=_generate_consumption_profile(interval.intervals()),
-                        quality_method=QualityMethod.ACTUAL,
-                        last_updated=generation_time,
-                        msats_load_time=generation_time,
-                    )
-                )
-                current_date += datetime.timedelta(days=1)
-            read_data.append((nmi_details, interval_data))
+    for (meter, register), values in zip(registers, register_reads):
+        nmi_details = NmiDetails(
+            nmi=meter_point.nmi,
+            nmi_configuration=nmi_config,
+            register_id=register.register_id,
+            register_suffix=register.suffix,
+            meter_serial_number=meter.serial_number,
+            uom=register.uom,
+            interval_length=interval,
+        )
+        interval_data = IntervalBlock(
+            start=start,
+            intervals=interval.intervals(),
+            values=values,
+            quality_method=QualityMethod.ACTUAL,
+            last_updated=generation_time,
+            msats_load_time=generation_time,
+        )
+        read_data.append((nmi_details, interval_data))
 
     return Nem12Data(header=header, read_data=read_data, terminator=Terminator())
 
 
-def _generate_consumption_profile(
-    intervals: int, min_value: float = -0.6, max_value: float = 0.8
-) -> tuple[Decimal, ...]:
+def _generate_reads(
+    provider: profiles.ProfileProvider, request: profiles.ProfileRequest
+) -> array.array:
     """
-    Generate reads over a 24 hour period over the given number of intervals.
-
-    By default, we bias the read values towards 0 with a negative lower bound that we then max to 0.
+    Generate the reads for one register over a chunk of days.
     """
-    # Generate a consumption profile with a bell shaped curve, peaking at approximately 8pm
-    values = sorted(
-        # Bias the numbers towards the mode
-        round(max(0, random.triangular(min_value, max_value, mode=0.6)), 4)
-        for _ in range(intervals)
-    )
-    # The pivot is selected to get to approximately 8pm
-    pivot = int(intervals // 1.2)
-    early, late = values[:pivot], values[pivot:]
-    # Low consumption in the morning, getting higher towards 8pm
-    early.sort()
-    # Peak at about 8pm, then decreasing towards midnight
-    late.sort(reverse=True)
-    padding = Decimal("0.0000")
-    return tuple(Decimal(f"{read}").quantize(padding) for read in early + late)
+    values = provider.reads(request)
+    if len(values) != request.days * request.intervals:
+        raise ValueError(
+            f"{type(provider).__name__} returned {len(values)} reads, "
+            f"expected {request.days * request.intervals}"
+        )
+    return values
 
 
 def _create_meterdata_notification(
-    meter_point: MeterPoint,
+    from_participant: str,
+    to_participant: str,
+    message_id: str,
+    now_tz: datetime.datetime,
 ) -> mdmt.MeterDataNotification:
-    now_tz = datetime.datetime.now(tz=zoneinfo.ZoneInfo("Etc/GMT-10"))
     meter_data_file = mdmt.MeterDataNotification()
     meter_data_file.header(
-        from_text=meter_point.role_mdp,
-        to_text=meter_point.role_frmp,
-        message_id=f"MTRD_MSG_NEM12_{now_tz.strftime('%Y%m%d%H%M%f')}",
+        from_text=from_participant,
+        to_text=to_participant,
+        message_id=message_id,
         message_date=now_tz.isoformat(timespec="seconds"),
         transaction_group="MTRD",
         priority="Medium",
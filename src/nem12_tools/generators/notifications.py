@@ -1,7 +1,7 @@
-from xml.etree import ElementTree as ET
-
 from lxml import etree
 
+from nem12_tools.parsers.index import write_index
+
 
 class MeterDataNotification:
     parser: etree.XMLParser
@@ -18,17 +18,16 @@ class MeterDataNotification:
     def xml_root(self):
         NS1 = "urn:aseXML:r43"
         NS2 = "http://www.w3.org/2001/XMLSchema-instance"
-        ET.register_namespace("ase", NS1)
-        ET.register_namespace("xsi", NS2)
-        qname1 = ET.QName(NS1, "aseXML")  # Element QName
-        qname2 = ET.QName(NS2, "schemaLocation")  # Attribute QName
-        root = ET.Element(
-            qname1.text,
-            {
-                qname2.text: "urn:aseXML:r43 http://www.nemmco.com.au/aseXML/schemas/r43/aseXML_r43.xsd"
-            },
+        # Prefixes are given per element rather than with ElementTree.register_namespace, which
+        # mutates a process-wide registry and so is unsafe to call from several threads.
+        qname1 = etree.QName(NS1, "aseXML")  # Element QName
+        qname2 = etree.QName(NS2, "schemaLocation")  # Attribute QName
+        root = etree.Element(
+            qname1,
+            {qname2: "urn:aseXML:r43 http://www.nemmco.com.au/aseXML/schemas/r43/aseXML_r43.xsd"},
+            nsmap={"ase": NS1, "xsi": NS2},
         )
-        return ET.tostring(root)
+        return etree.tostring(root)
 
     def header(
         self,
@@ -59,7 +58,7 @@ class MeterDataNotification:
         self.header_to = etree.SubElement(self.header_parent, "To")
         self.header_to.text = to_text
 
-        self.header_msg_id = etree.SubElement(self.header_parent, "messageID")
+        self.header_msg_id = etree.SubElement(self.header_parent, "MessageID")
         self.header_msg_id.text = message_id
 
         self.header_msg_date = etree.SubElement(self.header_parent, "MessageDate")
@@ -119,10 +118,15 @@ class MeterDataNotification:
       </Transactions>
       """
 
-    def write_xml(self, output_filename: str):
+    def write_xml(self, output_filename: str, index: bool = False):
+        """
+        Write the notification, optionally with a sidecar index of its row byte offsets.
+        """
         self.tree.write(
             output_filename,
             pretty_print=True,
             xml_declaration=True,
             encoding="utf-8",
         )
+        if index:
+            write_index(output_filename)
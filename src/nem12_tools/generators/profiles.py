@@ -0,0 +1,284 @@
+"""
+Profiles that shape the reads generated for a register.
+
+A ``ProfileProvider`` is asked for a whole run of days for one register at a time and returns
+every read as a single array, so a provider can build each day (or the whole range) with block
+operations rather than calling back into Python once per value.
+
+Providers are chosen per register by ``select_profile``, from the most specific key in a
+mapping: the register suffix (``E1``), then its data stream letter (``E``), then its unit of
+measure (``KWH``). Profiles given by the caller take precedence over ``DEFAULT_PROFILES``, and
+anything unmatched is treated as consumption.
+
+Providers may run on a process pool, so they must be picklable.
+"""
+
+import array
+import dataclasses
+import datetime
+import functools
+import math
+import mmap
+import os
+import pathlib
+import random
+from abc import ABC, abstractmethod
+from collections.abc import Mapping
+from types import MappingProxyType
+
+from nem12_tools.parsers.nmid import Register
+
+from .reads import READ_SCALE
+
+
+@dataclasses.dataclass(frozen=True)
+class ProfileRequest:
+    """
+    The reads wanted from a provider: ``days`` days of ``intervals`` reads from ``start``.
+    """
+
+    seed: int
+    nmi: str
+    register_suffix: str
+    uom: str
+    start: datetime.date
+    days: int
+    intervals: int
+
+    @property
+    def interval_hours(self) -> float:
+        return 24 / self.intervals
+
+    def read_date(self, day: int) -> datetime.date:
+        return self.start + datetime.timedelta(days=day)
+
+    def rng(self, day: int) -> random.Random:
+        """
+        A generator for one day of this register, independent of how the range is chunked.
+        """
+        return random.Random(
+            f"{self.seed}:{self.nmi}:{self.register_suffix}:{self.read_date(day)}"
+        )
+
+
+class ProfileProvider(ABC):
+    @abstractmethod
+    def reads(self, request: ProfileRequest) -> array.array:
+        """
+        Scaled integer reads (see ``READ_SCALE``) for every interval of the request, day
+        by day.
+        """
+
+
+@dataclasses.dataclass(frozen=True)
+class ConsumptionProfile(ProfileProvider):
+    """
+    Household consumption rising through the day to a peak at about 8pm.
+
+    Values are drawn from a triangular distribution biased towards ``mode``, with a negative
+    lower bound that is then clipped to 0 so some intervals have no consumption.
+    """
+
+    min_value: float = -0.6
+    max_value: float = 0.8
+    mode: float = 0.6
+
+    def reads(self, request: ProfileRequest) -> array.array:
+        values = array.array("q")
+        for day in range(request.days):
+            values.extend(self._day(request.intervals, request.rng(day)))
+        return values
+
+    def _day(self, intervals: int, rng: random.Random) -> list[int]:
+        values = sorted(
+            round(max(0, rng.triangular(self.min_value, self.max_value, self.mode)) * READ_SCALE)
+            for _ in range(intervals)
+        )
+        # The pivot is selected to get to approximately 8pm
+        pivot = int(intervals // 1.2)
+        early, late = values[:pivot], values[pivot:]
+        # Low consumption in the morning, getting higher towards 8pm
+        early.sort()
+        # Peak at about 8pm, then decreasing towards midnight
+        late.sort(reverse=True)
+        return early + late
+
+
+@dataclasses.dataclass(frozen=True)
+class SolarExportProfile(ProfileProvider):
+    """
+    Rooftop solar export: nothing overnight and a midday peak of up to ``peak_kw``, scaled each
+    day by a random clearness factor.
+    """
+
+    peak_kw: float = 3.0
+    sunrise: float = 6.0
+    sunset: float = 18.0
+
+    def reads(self, request: ProfileRequest) -> array.array:
+        shape = _solar_shape(request.intervals, self.sunrise, self.sunset)
+        scale = self.peak_kw * request.interval_hours * READ_SCALE
+        values = array.array("q")
+        for day in range(request.days):
+            clearness = request.rng(day).betavariate(5, 2)
+            values.extend([round(sun * clearness * scale) for sun in shape])
+        return values
+
+
+@dataclasses.dataclass(frozen=True)
+class FlatProfile(ProfileProvider):
+    """
+    A constant load of ``kw`` in every interval.
+    """
+
+    kw: float = 0.5
+
+    def reads(self, request: ProfileRequest) -> array.array:
+        value = round(self.kw * request.interval_hours * READ_SCALE)
+        return array.array("q", [value]) * (request.days * request.intervals)
+
+
+@dataclasses.dataclass(frozen=True)
+class CsvTemplateProfile(ProfileProvider):
+    """
+    Reads copied from a CSV template of kWh values, one row per day and one column per
+    interval. A date uses the row for its day of the year, wrapping around the template, so a
+    single row repeats daily and 365 rows give a yearly shape.
+
+    The template may have a different interval length to the request if one divides the
+    other: reads are summed into longer intervals or split evenly into shorter ones. Templates
+    are read through a memory map and cached per process until the file changes.
+    """
+
+    path: pathlib.Path
+    scale: float = 1.0
+
+    def reads(self, request: ProfileRequest) -> array.array:
+        stat = os.stat(self.path)
+        template = _resampled_template(
+            str(self.path), stat.st_mtime_ns, stat.st_size, self.scale, request.intervals
+        )
+        rows = len(template) // request.intervals
+        values = array.array("q")
+        for day in range(request.days):
+            row = (request.read_date(day).timetuple().tm_yday - 1) % rows
+            values.extend(template[row * request.intervals : (row + 1) * request.intervals])
+        return values
+
+
+#: Providers used for registers not matched by caller supplied profiles.
+DEFAULT_PROFILES: Mapping[str, ProfileProvider] = MappingProxyType(
+    {
+        "E": ConsumptionProfile(),
+        "B": SolarExportProfile(),
+        "Q": FlatProfile(kw=0.1),
+        "K": FlatProfile(kw=0.1),
+    }
+)
+
+_FALLBACK = ConsumptionProfile()
+
+_BUILT_INS = {
+    "consumption": ConsumptionProfile,
+    "solar": SolarExportProfile,
+    "flat": FlatProfile,
+}
+
+
+def select_profile(
+    register: Register, profiles: Mapping[str, ProfileProvider] | None = None
+) -> ProfileProvider:
+    keys = (register.suffix, register.suffix[:1], register.uom.upper())
+    for candidates in (profiles or {}, DEFAULT_PROFILES):
+        for key in keys:
+            if key in candidates:
+                return candidates[key]
+    return _FALLBACK
+
+
+def parse_profile(spec: str) -> ProfileProvider:
+    """
+    Parse a profile given on the command line: ``consumption``, ``solar``, ``flat`` or
+    ``flat:<kW>``, or the path to a CSV template.
+    """
+    name, _, argument = spec.partition(":")
+    if name == "flat" and argument:
+        try:
+            return FlatProfile(kw=float(argument))
+        except ValueError:
+            raise ValueError(f"Invalid flat load {argument!r}, expected kW") from None
+    if spec in _BUILT_INS:
+        return _BUILT_INS[spec]()
+    path = pathlib.Path(spec)
+    if not path.is_file():
+        raise ValueError(
+            f"Unknown profile {spec!r}, expected one of {', '.join(_BUILT_INS)} or a CSV file"
+        )
+    return CsvTemplateProfile(path)
+
+
+def _solar_shape(intervals: int, sunrise: float, sunset: float) -> list[float]:
+    hours = 24 / intervals
+    daylight = sunset - sunrise
+    return [
+        math.sin(math.pi * (hour - sunrise) / daylight) if sunrise < hour < sunset else 0.0
+        for hour in ((i + 0.5) * hours for i in range(intervals))
+    ]
+
+
+@functools.lru_cache(maxsize=16)
+def _load_template(path: str, mtime_ns: int, size: int) -> tuple[int, array.array]:
+    """
+    The interval count and scaled reads of a CSV template. ``mtime_ns`` and ``size`` are only
+    used to invalidate the cache when the file changes.
+    """
+    values = array.array("q")
+    intervals = 0
+    with (
+        open(path, "rb") as template,
+        mmap.mmap(template.fileno(), 0, access=mmap.ACCESS_READ) as data,
+    ):
+        for number, line in enumerate(iter(data.readline, b""), start=1):
+            line = line.strip()
+            if not line:
+                continue
+            fields = line.split(b",")
+            if intervals == 0:
+                intervals = len(fields)
+                if (24 * 60) % intervals:
+                    raise ValueError(f"{path}:{number}: {intervals} reads do not divide a day")
+            elif len(fields) != intervals:
+                raise ValueError(f"{path}:{number}: expected {intervals} reads, got {len(fields)}")
+            try:
+                values.extend([round(float(field) * READ_SCALE) for field in fields])
+            except ValueError:
+                raise ValueError(f"{path}:{number}: reads must be numbers") from None
+    if not values:
+        raise ValueError(f"{path}: template has no reads")
+    return intervals, values
+
+
+@functools.lru_cache(maxsize=16)
+def _resampled_template(
+    path: str, mtime_ns: int, size: int, scale: float, intervals: int
+) -> array.array:
+    template_intervals, values = _load_template(path, mtime_ns, size)
+    if scale != 1.0:
+        values = array.array("q", [round(value * scale) for value in values])
+    if template_intervals == intervals:
+        return values
+    resampled = array.array("q")
+    if template_intervals % intervals == 0:
+        group = template_intervals // intervals
+        for offset in range(0, len(values), group):
+            resampled.append(sum(values[offset : offset + group]))
+    elif intervals % template_intervals == 0:
+        parts = intervals // template_intervals
+        for value in values:
+            share, remainder = divmod(value, parts)
+            resampled.extend([share + 1] * remainder + [share] * (parts - remainder))
+    else:
+        raise ValueError(
+            f"{path}: {template_intervals} reads a day cannot be resampled to {intervals}"
+        )
+    return resampled
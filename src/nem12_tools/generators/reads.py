@@ -0,0 +1,15 @@
+"""
+The scaled integer representation of read values shared by the generators.
+"""
+
+#: Reads are held as integer multiples of 0.0001, the resolution of a NEM12 read value.
+READ_SCALE = 10_000
+
+
+def format_read(value: int) -> str:
+    """
+    Format a scaled integer read (see ``READ_SCALE``) as a 4 decimal place string.
+    """
+    if value < 0:
+        return "-%d.%04d" % divmod(-value, READ_SCALE)
+    return "%d.%04d" % divmod(value, READ_SCALE)
@@ -0,0 +1,304 @@
+"""
+Split fleet generation across machines and recombine the results.
+
+NMIs are assigned to shards by a stable hash, so every machine given the same ``--shard i/n``
+and inputs makes the same choice without coordination. Each shard writes a manifest of its
+outputs with checksums, and ``merge_manifests`` verifies a full set of shard manifests before
+combining them or repacking the outputs into size-limited messages.
+"""
+
+import datetime
+import hashlib
+import os
+import pathlib
+import zoneinfo
+from collections.abc import Iterable, Sequence
+
+from lxml import etree
+from pydantic import BaseModel, Field
+
+from nem12_tools.parsers.nem12 import Nem12Reader
+from nem12_tools.parsers.nmid import MeterPoint
+
+from . import nem12
+from . import notifications as mdmt
+
+MANIFEST_NAME = "manifest.json"
+
+
+class ManifestError(ValueError):
+    """
+    A set of manifests is incomplete, inconsistent or does not match its files.
+    """
+
+    def __init__(self, problems: Sequence[str]):
+        super().__init__("\n".join(problems))
+        self.problems = list(problems)
+
+
+class Shard(BaseModel):
+    """
+    Shard ``index`` (1-based) of ``count``.
+    """
+
+    index: int = Field(ge=1)
+    count: int = Field(ge=1)
+
+    @classmethod
+    def parse(cls, value: str) -> "Shard":
+        index, _, count = value.partition("/")
+        try:
+            shard = cls(index=int(index), count=int(count))
+        except ValueError:
+            raise ValueError(f"Invalid shard {value!r}, expected i/n") from None
+        if shard.index > shard.count:
+            raise ValueError(f"Invalid shard {value!r}, i must be between 1 and n")
+        return shard
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+    def includes(self, nmi: str) -> bool:
+        return shard_index(nmi, self.count) == self.index
+
+    def manifest_name(self) -> str:
+        return f"manifest-{self.index}-of-{self.count}.json"
+
+
+class ManifestFile(BaseModel):
+    path: str
+    nmis: list[str]
+    bytes: int
+    sha256: str
+
+
+class Manifest(BaseModel):
+    """
+    The outputs of a generation run. ``shard`` is None once shards have been merged.
+    """
+
+    shard: Shard | None
+    shards: int
+    seed: int
+    start: datetime.date
+    end: datetime.date
+    interval: nem12.IntervalLength
+    files: list[ManifestFile] = []
+
+    def write(self, path: str | pathlib.Path) -> None:
+        pathlib.Path(path).write_text(self.model_dump_json(indent=2) + "\n")
+
+    @classmethod
+    def read(cls, path: str | pathlib.Path) -> "Manifest":
+        return cls.model_validate_json(pathlib.Path(path).read_text())
+
+
+def shard_index(nmi: str, count: int) -> int:
+    """
+    The 1-based shard an NMI belongs to. Stable across processes, machines and Python versions.
+    """
+    digest = hashlib.blake2b(nmi.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % count + 1
+
+
+def select(meter_points: Iterable[MeterPoint], shard: Shard) -> list[MeterPoint]:
+    return [meter_point for meter_point in meter_points if shard.includes(meter_point.nmi)]
+
+
+def manifest_file(path: pathlib.Path, root: pathlib.Path, nmis: list[str]) -> ManifestFile:
+    """
+    Checksum a written output for inclusion in a manifest stored in ``root``.
+    """
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as output:
+        while chunk := output.read(1024 * 1024):
+            sha256.update(chunk)
+    return ManifestFile(
+        path=pathlib.Path(os.path.relpath(path, root)).as_posix(),
+        nmis=nmis,
+        bytes=path.stat().st_size,
+        sha256=sha256.hexdigest(),
+    )
+
+
+def merge_manifests(
+    manifest_paths: Sequence[str | pathlib.Path],
+    output_dir: str | pathlib.Path,
+    *,
+    max_bytes: int | None = None,
+) -> Manifest:
+    """
+    Verify a complete set of shard manifests and write a combined manifest to ``output_dir``.
+
+    With ``max_bytes``, the shard outputs are repacked into new MeterDataNotifications of at
+    most that size (an NMI that alone exceeds it gets a message of its own) and the combined
+    manifest lists those instead.
+    """
+    output_dir = pathlib.Path(output_dir)
+    shards = [(pathlib.Path(path).parent, Manifest.read(path)) for path in manifest_paths]
+    _verify(shards)
+    first = shards[0][1]
+    merged = Manifest(
+        shard=None,
+        shards=first.shards,
+        seed=first.seed,
+        start=first.start,
+        end=first.end,
+        interval=first.interval,
+    )
+    output_dir.mkdir(parents=True, exist_ok=True)
+    if max_bytes is None:
+        for root, manifest in shards:
+            for file in manifest.files:
+                merged.files.append(
+                    file.model_copy(
+                        update={
+                            "path": pathlib.Path(
+                                os.path.relpath(root / file.path, output_dir)
+                            ).as_posix()
+                        }
+                    )
+                )
+    else:
+        packer = _Packer(output_dir, max_bytes)
+        for root, manifest in shards:
+            for file in manifest.files:
+                packer.add_file(root / file.path)
+        merged.files = packer.close()
+    merged.write(output_dir / MANIFEST_NAME)
+    return merged
+
+
+def _verify(shards: Sequence[tuple[pathlib.Path, Manifest]]) -> None:
+    problems = []
+    if not shards:
+        raise ManifestError(["No manifests given"])
+    first = shards[0][1]
+    settings = ("shards", "seed", "start", "end", "interval")
+    seen_shards: set[int] = set()
+    seen_nmis: set[str] = set()
+    for root, manifest in shards:
+        if manifest.shard is None:
+            problems.append(f"{root}: manifest is not for a single shard")
+            continue
+        for setting in settings:
+            if getattr(manifest, setting) != getattr(first, setting):
+                problems.append(f"Shard {manifest.shard}: {setting} differs from other shards")
+        if manifest.shard.index in seen_shards:
+            problems.append(f"Shard {manifest.shard} given more than once")
+        seen_shards.add(manifest.shard.index)
+        for file in manifest.files:
+            for nmi in file.nmis:
+                if nmi in seen_nmis:
+                    problems.append(f"NMI {nmi} appears in more than one output")
+                seen_nmis.add(nmi)
+                if not manifest.shard.includes(nmi):
+                    problems.append(f"NMI {nmi} does not belong to shard {manifest.shard}")
+            problems.extend(_verify_file(root, file))
+    missing = sorted(set(range(1, first.shards + 1)) - seen_shards)
+    if missing:
+        problems.append(f"Missing shard(s) {', '.join(map(str, missing))} of {first.shards}")
+    if problems:
+        raise ManifestError(problems)
+
+
+def _verify_file(root: pathlib.Path, file: ManifestFile) -> list[str]:
+    path = root / file.path
+    if not path.is_file():
+        return [f"{path}: missing"]
+    actual = manifest_file(path, root, file.nmis)
+    if (actual.bytes, actual.sha256) != (file.bytes, file.sha256):
+        return [f"{path}: checksum does not match manifest"]
+    return []
+
+
+class _Packer:
+    """
+    Accumulate whole NMIs' 200-500 rows into messages no larger than ``max_bytes``.
+    """
+
+    def __init__(self, output_dir: pathlib.Path, max_bytes: int):
+        self.output_dir = output_dir
+        self.max_bytes = max_bytes
+        self.files: list[ManifestFile] = []
+        self.participants: tuple[str, str] | None = None
+        self.limit = 0
+        self.rows: list[str] = []
+        self.size = 0
+        self.nmis: list[str] = []
+        self.now_tz = datetime.datetime.now(tz=zoneinfo.ZoneInfo("Etc/GMT-10"))
+        self.run_id = nem12.new_run_id()
+
+    def add_file(self, path: pathlib.Path) -> None:
+        participants = None
+        nmi = None
+        rows: list[str] = []
+        with open(path, "rb") as nem12_file:
+            for record in Nem12Reader(nem12_file):
+                if record.indicator == "100":
+                    participants = (record.fields[3], record.fields[4])
+                elif record.indicator == "900":
+                    continue
+                else:
+                    if record.indicator == "200" and record.fields[1] != nmi:
+                        if nmi is not None and participants:
+                            self._add_nmi(participants, nmi, rows)
+                        nmi, rows = record.fields[1], []
+                    rows.append(",".join(record.fields) + "\n")
+        if nmi is not None and participants:
+            self._add_nmi(participants, nmi, rows)
+
+    def close(self) -> list[ManifestFile]:
+        self._flush()
+        return self.files
+
+    def _add_nmi(self, participants: tuple[str, str], nmi: str, rows: list[str]) -> None:
+        size = sum(map(len, rows))
+        if participants != self.participants:
+            self._flush()
+            self.participants = participants
+            self.limit = self.max_bytes - self._overhead(participants)
+        elif self.size + size > self.limit:
+            self._flush()
+        self.rows.extend(rows)
+        self.size += size
+        self.nmis.append(nmi)
+
+    def _flush(self) -> None:
+        if not self.rows or self.participants is None:
+            return
+        path = self.output_dir / f"nem12_{len(self.files):06d}.xml"
+        notification = self._notification(self.participants, "".join(self.rows))
+        notification.write_xml(str(path))
+        self.files.append(manifest_file(path, self.output_dir, self.nmis))
+        self.rows, self.size, self.nmis = [], 0, []
+
+    def _notification(
+        self, participants: tuple[str, str], rows: str
+    ) -> mdmt.MeterDataNotification:
+        from_participant, to_participant = participants
+        header = ",".join(
+            nem12.Header(
+                generation_time=self.now_tz,
+                from_participant=from_participant,
+                to_participant=to_participant,
+            ).as_row()
+        )
+        return nem12.notification_from_csv(
+            from_participant,
+            to_participant,
+            f"{header}\n{rows}900\n",
+            self.now_tz,
+            message_id=nem12.new_message_id(self.run_id, len(self.files)),
+        )
+
+    def _overhead(self, participants: tuple[str, str]) -> int:
+        """
+        The size of a message between the participants with no 200-500 rows.
+        """
+        notification = self._notification(participants, "")
+        return len(
+            etree.tostring(
+                notification.tree, pretty_print=True, xml_declaration=True, encoding="utf-8"
+            )
+        )
@@ -0,0 +1,248 @@
+"""
+Emit MeterDataNotifications into a spool directory at a controlled rate.
+
+This stands in for an MDP delivering files through the market hub. Notifications are
+generated on a background thread into a bounded prefetch queue, and the calling thread writes
+them out on schedule. Each file is written under a temporary name and renamed into place, so
+anything watching the spool directory only ever sees complete files.
+"""
+
+import dataclasses
+import datetime
+import itertools
+import os
+import pathlib
+import queue
+import threading
+import time
+from collections.abc import Callable, Sequence
+
+from lxml import etree
+
+from nem12_tools.parsers.nmid import MeterPoint
+
+from . import nem12
+
+
+@dataclasses.dataclass(frozen=True)
+class EmitStats:
+    """
+    Progress of an emitter. ``backlog`` is the number of generated files waiting to be written
+    and ``lag`` is how many seconds the emitter is behind its target schedule.
+
+    The rates are measured over the gaps between the first and last writes, each file counting
+    towards the gap that follows it, so they compare directly with the target rates.
+    """
+
+    files: int
+    bytes: int
+    elapsed: float
+    files_per_second: float
+    megabytes_per_second: float
+    backlog: int
+    lag: float
+
+    def __str__(self) -> str:
+        return (
+            f"{self.files} files, {self.bytes / 1_000_000:.2f} MB in {self.elapsed:.1f}s "
+            f"({self.files_per_second:.2f} files/s, {self.megabytes_per_second:.2f} MB/s), "
+            f"backlog {self.backlog}, lag {self.lag:.2f}s"
+        )
+
+
+#: A generated file, an error raised while generating, or None once generation has finished.
+_Pending = tuple[str, bytes] | BaseException | None
+
+
+def emit(
+    meter_points: Sequence[MeterPoint],
+    spool_dir: str | pathlib.Path,
+    start: datetime.date,
+    end: datetime.date,
+    interval: nem12.IntervalLength = nem12.IntervalLength.FIVE_MINUTES,
+    *,
+    files_per_second: float | None = None,
+    megabytes_per_second: float | None = None,
+    count: int | None = None,
+    duration: float | None = None,
+    prefetch: int = 8,
+    seed: int | None = None,
+    report: Callable[[EmitStats], None] | None = None,
+    report_every: float = 5.0,
+) -> EmitStats:
+    """
+    Write notifications for the meter points, round robin, into ``spool_dir``.
+
+    Files are paced to whichever of ``files_per_second`` and ``megabytes_per_second`` is
+    slower; with neither, they are written as fast as they are generated. Emission stops after
+    ``count`` files or ``duration`` seconds, whichever comes first. At least one is required.
+    """
+    if not meter_points:
+        raise ValueError("At least one meter point is required")
+    if count is None and duration is None:
+        raise ValueError("One of count or duration is required")
+    spool_dir = pathlib.Path(spool_dir)
+    spool_dir.mkdir(parents=True, exist_ok=True)
+
+    pending: queue.Queue[_Pending] = queue.Queue(maxsize=prefetch)
+    stop = threading.Event()
+    producer = threading.Thread(
+        target=_produce,
+        args=(meter_points, start, end, interval, seed, count, pending, stop),
+        name="nem12-emit-producer",
+        daemon=True,
+    )
+
+    paced = bool(files_per_second or megabytes_per_second)
+    files = written = last_size = 0
+    first_write = last_write = 0.0
+    began = time.monotonic()
+    due = began
+    last_report = began
+    deadline = None if duration is None else began + duration
+    producer.start()
+    try:
+        while True:
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            item = _next_item(pending, deadline)
+            if item is None:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            name, content = item
+            wait = due - time.monotonic()
+            if deadline is not None and due > deadline:
+                break
+            if wait > 0:
+                time.sleep(wait)
+            _write_atomic(spool_dir, name, content)
+            now = last_write = time.monotonic()
+            if not files:
+                # Pace from the first write, not from waiting for the first file to generate.
+                first_write = due = now
+            files += 1
+            written += len(content)
+            last_size = len(content)
+            due += _spacing(len(content), files_per_second, megabytes_per_second)
+            if report is not None and now - last_report >= report_every:
+                report(
+                    _stats(
+                        files,
+                        written,
+                        last_size,
+                        began,
+                        last_write - first_write,
+                        now,
+                        pending,
+                        due if paced else now,
+                    )
+                )
+                last_report = now
+    finally:
+        stop.set()
+        producer.join()
+    now = time.monotonic()
+    return _stats(
+        files,
+        written,
+        last_size,
+        began,
+        last_write - first_write,
+        now,
+        pending,
+        due if paced else now,
+    )
+
+
+def _produce(
+    meter_points: Sequence[MeterPoint],
+    start: datetime.date,
+    end: datetime.date,
+    interval: nem12.IntervalLength,
+    seed: int | None,
+    count: int | None,
+    pending: queue.Queue[_Pending],
+    stop: threading.Event,
+) -> None:
+    try:
+        sequence = itertools.count() if count is None else range(count)
+        for number, meter_point in zip(sequence, itertools.cycle(meter_points)):
+            notification = nem12.generate_nem12(
+                meter_point,
+                start,
+                end,
+                interval,
+                seed=None if seed is None else seed + number,
+            )
+            content = etree.tostring(
+                notification.tree, pretty_print=True, xml_declaration=True, encoding="utf-8"
+            )
+            if not _put(pending, (f"nem12_{meter_point.nmi}_{number:08d}.xml", content), stop):
+                return
+        _put(pending, None, stop)
+    except BaseException as e:
+        _put(pending, e, stop)
+
+
+def _put(pending: queue.Queue[_Pending], item: _Pending, stop: threading.Event) -> bool:
+    while not stop.is_set():
+        try:
+            pending.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _next_item(pending: queue.Queue[_Pending], deadline: float | None) -> _Pending:
+    """
+    The next item from the producer, or None if the deadline passes while waiting for it.
+    """
+    if deadline is None:
+        return pending.get()
+    try:
+        return pending.get(timeout=max(0.0, deadline - time.monotonic()))
+    except queue.Empty:
+        return None
+
+
+def _spacing(
+    size: int, files_per_second: float | None, megabytes_per_second: float | None
+) -> float:
+    spacing = 0.0
+    if files_per_second:
+        spacing = 1 / files_per_second
+    if megabytes_per_second:
+        spacing = max(spacing, size / 1_000_000 / megabytes_per_second)
+    return spacing
+
+
+def _write_atomic(spool_dir: pathlib.Path, name: str, content: bytes) -> None:
+    temporary = spool_dir / f".{name}.tmp"
+    temporary.write_bytes(content)
+    os.replace(temporary, spool_dir / name)
+
+
+def _stats(
+    files: int,
+    written: int,
+    last_size: int,
+    began: float,
+    span: float,
+    now: float,
+    pending: queue.Queue[_Pending],
+    due: float,
+) -> EmitStats:
+    """
+    ``span`` is the time from the first write to the last, of ``last_size`` bytes.
+    """
+    return EmitStats(
+        files=files,
+        bytes=written,
+        elapsed=now - began,
+        files_per_second=(files - 1) / span if span else 0.0,
+        megabytes_per_second=(written - last_size) / 1_000_000 / span if span else 0.0,
+        backlog=pending.qsize(),
+        lag=max(0.0, now - due),
+    )
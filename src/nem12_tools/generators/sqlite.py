@@ -0,0 +1,236 @@
+"""
+Write generated NEM12 data into a local SQLite database.
+
+Each 200 record becomes a row of ``nmi_details``. Interval reads are stored in one of two
+layouts:
+
+- ``normalised``: ``interval_reads`` holds one row per interval value.
+- ``wide``: ``interval_days`` holds one row per 300 record, with the day's reads packed into a
+  BLOB of little-endian 64-bit integers (see ``decode_reads``).
+
+Read values are stored as integers in units of 1/``READ_SCALE`` kWh, exactly as generated.
+Writing reads for a register that is already in the database replaces its reads on the same
+dates and keeps the others, unless the interval length has changed, when all of its earlier
+reads are removed.
+Rows are inserted with ``executemany`` inside large transactions, with pragmas that trade
+durability for speed, as the database is a disposable benchmark fixture.
+"""
+
+import array
+import enum
+import itertools
+import pathlib
+import sqlite3
+import sys
+from collections.abc import Iterator
+from types import TracebackType
+
+from .nem12 import IntervalBlock, Nem12Data, Nem12Sink
+
+#: Number of rows inserted before the current transaction is committed.
+ROWS_PER_TRANSACTION = 2_000_000
+
+_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = OFF",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -262144",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS nmi_details (
+    id INTEGER PRIMARY KEY,
+    nmi TEXT NOT NULL,
+    nmi_configuration TEXT NOT NULL,
+    register_id TEXT NOT NULL,
+    register_suffix TEXT NOT NULL,
+    mdm_data_stream TEXT NOT NULL,
+    meter_serial_number TEXT NOT NULL,
+    uom TEXT NOT NULL,
+    interval_length INTEGER NOT NULL,
+    UNIQUE (nmi, register_suffix)
+);
+CREATE TABLE IF NOT EXISTS interval_reads (
+    nmi_details_id INTEGER NOT NULL REFERENCES nmi_details (id),
+    read_date TEXT NOT NULL,
+    interval INTEGER NOT NULL,
+    read_value INTEGER NOT NULL,
+    quality_method TEXT NOT NULL,
+    PRIMARY KEY (nmi_details_id, read_date, interval)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS interval_days (
+    nmi_details_id INTEGER NOT NULL REFERENCES nmi_details (id),
+    read_date TEXT NOT NULL,
+    read_values BLOB NOT NULL,
+    quality_method TEXT NOT NULL,
+    last_updated TEXT NOT NULL,
+    msats_load_time TEXT NOT NULL,
+    PRIMARY KEY (nmi_details_id, read_date)
+) WITHOUT ROWID;
+"""
+
+
+@enum.unique
+class Layout(enum.StrEnum):
+    NORMALISED = "normalised"
+    WIDE = "wide"
+
+
+def decode_reads(read_values: bytes) -> array.array:
+    """
+    Unpack the ``read_values`` BLOB of the wide layout into scaled integer reads.
+    """
+    reads = array.array("q", read_values)
+    if sys.byteorder == "big":
+        reads.byteswap()
+    return reads
+
+
+class SqliteSink(Nem12Sink):
+    """
+    Bulk load NEM12 data into a SQLite database, creating the schema if necessary.
+
+    Use as a context manager, or call ``close`` to commit the final transaction.
+    """
+
+    def __init__(
+        self,
+        path: str | pathlib.Path,
+        layout: Layout = Layout.NORMALISED,
+        *,
+        rows_per_transaction: int = ROWS_PER_TRANSACTION,
+    ):
+        self.layout = layout
+        self.rows_per_transaction = rows_per_transaction
+        self.connection = sqlite3.connect(path, isolation_level=None)
+        for pragma in _PRAGMAS:
+            self.connection.execute(pragma)
+        self.connection.executescript(_SCHEMA)
+        self._pending_rows = 0
+
+    def write(self, nem_12_data: Nem12Data) -> None:
+        if not self.connection.in_transaction:
+            self.connection.execute("BEGIN")
+        for nmi_details, interval_data in nem_12_data.read_data:
+            key = (nmi_details.nmi, nmi_details.register_suffix)
+            stored = self.connection.execute(
+                "SELECT id, interval_length FROM nmi_details"
+                " WHERE nmi = ? AND register_suffix = ?",
+                key,
+            ).fetchone()
+            details = (
+                nmi_details.nmi,
+                nmi_details.nmi_configuration,
+                nmi_details.register_id,
+                nmi_details.register_suffix,
+                nmi_details.mdm_data_stream,
+                nmi_details.meter_serial_number,
+                nmi_details.uom,
+                nmi_details.interval_length.value,
+            )
+            self.connection.execute(
+                "INSERT INTO nmi_details (nmi, nmi_configuration, register_id, register_suffix,"
+                " mdm_data_stream, meter_serial_number, uom, interval_length)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (nmi, register_suffix) DO UPDATE SET"
+                " nmi_configuration = excluded.nmi_configuration,"
+                " register_id = excluded.register_id,"
+                " mdm_data_stream = excluded.mdm_data_stream,"
+                " meter_serial_number = excluded.meter_serial_number,"
+                " uom = excluded.uom,"
+                " interval_length = excluded.interval_length",
+                details,
+            )
+            if stored is None:
+                (details_id,) = self.connection.execute(
+                    "SELECT id FROM nmi_details WHERE nmi = ? AND register_suffix = ?", key
+                ).fetchone()
+            else:
+                details_id, interval_length = stored
+                self._clear_reads(
+                    details_id, interval_data, interval_length != nmi_details.interval_length.value
+                )
+            if self.layout is Layout.NORMALISED:
+                self.connection.executemany(
+                    "INSERT INTO interval_reads VALUES (?, ?, ?, ?, ?)",
+                    _interval_reads(details_id, interval_data),
+                )
+                self._pending_rows += len(interval_data.values)
+            else:
+                self.connection.executemany(
+                    "INSERT INTO interval_days VALUES (?, ?, ?, ?, ?, ?)",
+                    _interval_days(details_id, interval_data),
+                )
+                self._pending_rows += len(interval_data)
+        if self._pending_rows >= self.rows_per_transaction:
+            self.commit()
+
+    def _clear_reads(
+        self, details_id: int, interval_data: IntervalBlock, whole_history: bool
+    ) -> None:
+        """
+        Delete a register's reads from both layouts over the dates of ``interval_data``, or
+        every read when the interval length has changed and earlier days no longer match.
+        """
+        if whole_history:
+            condition, parameters = "nmi_details_id = ?", (details_id,)
+        else:
+            condition = "nmi_details_id = ? AND read_date BETWEEN ? AND ?"
+            parameters = (
+                details_id,
+                interval_data.start.isoformat(),
+                interval_data.read_date(len(interval_data) - 1).isoformat(),
+            )
+        for table in ("interval_reads", "interval_days"):
+            self.connection.execute(f"DELETE FROM {table} WHERE {condition}", parameters)
+
+    def commit(self) -> None:
+        if self.connection.in_transaction:
+            self.connection.execute("COMMIT")
+        self._pending_rows = 0
+
+    def close(self) -> None:
+        self.commit()
+        self.connection.close()
+
+    def __enter__(self) -> "SqliteSink":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+
+def _interval_reads(
+    details_id: int, interval_data: IntervalBlock
+) -> Iterator[tuple[int, str, int, int, str]]:
+    ids = itertools.repeat(details_id)
+    quality_methods = itertools.repeat(interval_data.quality_method.value)
+    intervals = range(1, interval_data.intervals + 1)
+    for day in range(len(interval_data)):
+        read_dates = itertools.repeat(interval_data.read_date(day).isoformat())
+        yield from zip(ids, read_dates, intervals, interval_data.day_reads(day), quality_methods)
+
+
+def _interval_days(
+    details_id: int, interval_data: IntervalBlock
+) -> Iterator[tuple[int, str, bytes, str, str, str]]:
+    quality_method = interval_data.quality_method.value
+    last_updated = interval_data.last_updated.isoformat()
+    msats_load_time = interval_data.msats_load_time.isoformat()
+    for day in range(len(interval_data)):
+        reads = interval_data.day_reads(day)
+        if sys.byteorder == "big":
+            reads.byteswap()
+        yield (
+            details_id,
+            interval_data.read_date(day).isoformat(),
+            reads.tobytes(),
+            quality_method,
+            last_updated,
+            msats_load_time,
+        )
@@ -0,0 +1,175 @@
+"""
+Sidecar indexes giving random access to the 200 and 300 rows of a NEM12 file.
+
+The index is a binary file stored next to the data file (``<file>.idx``) mapping each
+(NMI, register suffix, read date) to the byte offset and length of its row. After a short
+header it holds fixed-width entries sorted by key, so opening an index costs the same however
+large it is, and each lookup is a binary search through a memory map of it. 200 rows are stored
+with an empty read date, which sorts before the register's 300 rows.
+
+Offsets point into the data file as written, so rows of an aseXML file are returned with any
+XML escapes still in place.
+"""
+
+import datetime
+import mmap
+import pathlib
+import struct
+from collections.abc import Iterator
+from types import TracebackType
+
+from .nem12 import Nem12Reader
+
+INDEX_SUFFIX = ".idx"
+_MAGIC = b"NEM12IX1"
+# NMI, register suffix and read date, NUL padded, then the row's offset and length.
+_ENTRY = struct.Struct("<10s2s8sQI")
+_KEY_SIZE = 20
+
+
+def index_path(data_path: str | pathlib.Path) -> pathlib.Path:
+    data_path = pathlib.Path(data_path)
+    return data_path.with_name(data_path.name + INDEX_SUFFIX)
+
+
+def write_index(data_path: str | pathlib.Path) -> pathlib.Path:
+    """
+    Scan a written aseXML or CSV NEM12 file and write its sidecar index, returning its path.
+    """
+    path = index_path(data_path)
+    entries = []
+    nmi = suffix = ""
+    with open(data_path, "rb") as data:
+        for record in Nem12Reader(data):
+            fields = record.fields
+            if record.indicator == "200" and len(fields) > 4:
+                nmi, suffix = fields[1], fields[4]
+                entries.append(_entry(nmi, suffix, "", record.offset, record.length))
+            elif record.indicator == "300" and nmi and len(fields) > 1:
+                entries.append(_entry(nmi, suffix, fields[1], record.offset, record.length))
+    entries.sort()
+    with open(path, "wb") as index:
+        index.write(_MAGIC)
+        index.writelines(entries)
+    return path
+
+
+class Nem12Index:
+    """
+    Fetch individual rows of a NEM12 file through its sidecar index.
+
+    Both the index and the data file are memory-mapped, so opening the index reads only its
+    header and each lookup touches only the entries it searches and the bytes of the row.
+    """
+
+    def __init__(self, data_path: str | pathlib.Path):
+        path = index_path(data_path)
+        # The maps hold their own file descriptors, so the files can be closed straight away.
+        with open(path, "rb") as index:
+            self._index = mmap.mmap(index.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._index[: len(_MAGIC)] != _MAGIC or (len(self._index) - len(_MAGIC)) % _ENTRY.size:
+            self._index.close()
+            raise ValueError(f"{path} is not a NEM12 index")
+        self._entries = (len(self._index) - len(_MAGIC)) // _ENTRY.size
+        try:
+            with open(data_path, "rb") as data:
+                self._data = mmap.mmap(data.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            self._index.close()
+            raise
+
+    def close(self) -> None:
+        self._data.close()
+        self._index.close()
+
+    def __enter__(self) -> "Nem12Index":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def __contains__(self, key: tuple[str, str, str]) -> bool:
+        return self._find(*key) is not None
+
+    def raw(self, nmi: str, register_suffix: str, read_date: str = "") -> bytes:
+        """
+        The bytes of a row. ``read_date`` is ``YYYYMMDD`` for 300 rows, or empty for 200 rows.
+
+        The bytes are copied from the data file as they are, so for aseXML input they may
+        contain XML escapes such as ``&amp;``.
+        """
+        location = self._find(nmi, register_suffix, read_date)
+        if location is None:
+            raise KeyError((nmi, register_suffix, read_date))
+        offset, length = location
+        return self._data[offset : offset + length]
+
+    def nmi_details(self, nmi: str, register_suffix: str) -> list[str]:
+        return self.raw(nmi, register_suffix).decode("utf-8").split(",")
+
+    def interval_data(self, nmi: str, register_suffix: str, read_date: datetime.date) -> list[str]:
+        row = self.raw(nmi, register_suffix, read_date.strftime("%Y%m%d"))
+        return row.decode("utf-8").split(",")
+
+    def interval_range(
+        self, nmi: str, register_suffix: str, start: datetime.date, end: datetime.date
+    ) -> Iterator[list[str]]:
+        """
+        The 300 rows for each read date from ``start`` to ``end`` inclusive that are present.
+        """
+        first = _key(nmi, register_suffix, start.strftime("%Y%m%d"))
+        last = _key(nmi, register_suffix, end.strftime("%Y%m%d"))
+        for position in range(self._lower_bound(first), self._entries):
+            key, offset, length = self._entry(position)
+            if key > last:
+                break
+            yield self._data[offset : offset + length].decode("utf-8").split(",")
+
+    def _find(self, nmi: str, register_suffix: str, read_date: str) -> tuple[int, int] | None:
+        try:
+            key = _key(nmi, register_suffix, read_date)
+        except ValueError:
+            return None
+        position = self._lower_bound(key)
+        if position == self._entries:
+            return None
+        found, offset, length = self._entry(position)
+        return (offset, length) if found == key else None
+
+    def _lower_bound(self, key: bytes) -> int:
+        """
+        The position of the first entry whose key is not less than ``key``.
+        """
+        low, high = 0, self._entries
+        while low < high:
+            middle = (low + high) // 2
+            start = len(_MAGIC) + middle * _ENTRY.size
+            if self._index[start : start + _KEY_SIZE] < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _entry(self, position: int) -> tuple[bytes, int, int]:
+        start = len(_MAGIC) + position * _ENTRY.size
+        _, _, _, offset, length = _ENTRY.unpack_from(self._index, start)
+        return self._index[start : start + _KEY_SIZE], offset, length
+
+
+def _entry(nmi: str, register_suffix: str, read_date: str, offset: int, length: int) -> bytes:
+    """
+    A packed index entry, raising ``ValueError`` if a key field is too long for it.
+    """
+    fields = (nmi.encode(), register_suffix.encode(), read_date.encode())
+    if any(len(field) > size for field, size in zip(fields, (10, 2, 8))):
+        raise ValueError(f"Cannot index {nmi!r}, {register_suffix!r}, {read_date!r}")
+    return _ENTRY.pack(*fields, offset, length)
+
+
+def _key(nmi: str, register_suffix: str, read_date: str) -> bytes:
+    return _entry(nmi, register_suffix, read_date, 0, 0)[:_KEY_SIZE]
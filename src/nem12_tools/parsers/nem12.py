@@ -0,0 +1,142 @@
+"""
+Stream NEM12 records out of aseXML MeterDataNotifications or bare NEM12 CSV files.
+
+Files are read a line at a time so that memory use is bounded by the longest record rather
+than the size of the file.
+"""
+
+import dataclasses
+import enum
+import re
+from collections.abc import Iterator
+from typing import IO
+from xml.sax.saxutils import unescape
+
+_CSV_OPEN = b"<CSVIntervalData"
+_CSV_CLOSE = b"</CSVIntervalData>"
+_ELEMENT_RE = re.compile(rb"<(?:[A-Za-z_][\w.-]*:)?([A-Za-z_][\w.-]*)")
+_HEADER_RE = re.compile(rb"<Header\b[^>]*>(.*?)</Header>", re.DOTALL)
+_HEADER_FIELD_RE = re.compile(rb"<([A-Za-z_][\w.-]*)\b[^>]*>([^<]*)</\1>")
+_ENTITIES = {"&quot;": '"', "&apos;": "'"}
+
+
+class Nem12FormatError(ValueError):
+    """
+    The file could not be read as NEM12 data.
+    """
+
+    def __init__(self, line: int, message: str):
+        super().__init__(f"line {line}: {message}")
+        self.line = line
+        self.message = message
+
+
+@enum.unique
+class FileFormat(enum.StrEnum):
+    ASEXML = "asexml"
+    CSV = "csv"
+
+
+@dataclasses.dataclass(frozen=True)
+class Record:
+    """
+    A single NEM12 record (row) and where it was found in the file.
+
+    ``offset`` and ``length`` locate the raw bytes of the row, excluding the line terminator.
+    """
+
+    line: int
+    offset: int
+    length: int
+    fields: list[str]
+
+    @property
+    def indicator(self) -> str:
+        return self.fields[0]
+
+
+class Nem12Reader:
+    """
+    Iterate the NEM12 records of an aseXML or bare CSV file.
+
+    The format is detected from the first non-blank line. For aseXML, the envelope preceding
+    the ``CSVIntervalData`` element is captured so that ``elements`` and ``header`` are
+    available once iteration has started.
+    """
+
+    format: FileFormat | None
+    elements: list[str]
+    header: dict[str, str]
+
+    def __init__(self, fp: IO[bytes]):
+        self._fp = fp
+        self.format = None
+        self.elements = []
+        self.header = {}
+
+    def __iter__(self) -> Iterator[Record]:
+        envelope = bytearray()
+        in_csv = False
+        offset = 0
+        line_no = 0
+        for line_no, line in enumerate(self._fp, start=1):
+            line_offset = offset
+            offset += len(line)
+            start = 0
+            if not in_csv:
+                if self.format is None:
+                    if not line.strip():
+                        continue
+                    self.format = (
+                        FileFormat.ASEXML if line.lstrip().startswith(b"<") else FileFormat.CSV
+                    )
+                if self.format is FileFormat.CSV:
+                    in_csv = True
+                else:
+                    tag = line.find(_CSV_OPEN)
+                    if tag < 0:
+                        envelope += line
+                        continue
+                    envelope += line[:tag]
+                    self._read_envelope(bytes(envelope))
+                    start = line.find(b">", tag) + 1
+                    if not start:
+                        raise Nem12FormatError(line_no, "CSVIntervalData tag must be on one line")
+                    in_csv = True
+
+            content = line[start:]
+            closed = False
+            if self.format is FileFormat.ASEXML:
+                close = content.find(_CSV_CLOSE)
+                if close >= 0:
+                    content = content[:close]
+                    closed = True
+            text = content.strip()
+            if text:
+                start += len(content) - len(content.lstrip())
+                fields = text.decode("utf-8")
+                if "&" in fields:
+                    fields = unescape(fields, _ENTITIES)
+                yield Record(line_no, line_offset + start, len(text), fields.split(","))
+            if closed:
+                return
+
+        if self.format is FileFormat.ASEXML:
+            if in_csv:
+                raise Nem12FormatError(line_no, "CSVIntervalData element is not closed")
+            raise Nem12FormatError(line_no, "CSVIntervalData element not found")
+
+    def _read_envelope(self, envelope: bytes) -> None:
+        self.elements = [name.decode() for name in _ELEMENT_RE.findall(envelope)]
+        if header := _HEADER_RE.search(envelope):
+            self.header = {
+                name.decode(): unescape(value.decode("utf-8").strip(), _ENTITIES)
+                for name, value in _HEADER_FIELD_RE.findall(header.group(1))
+            }
+
+
+def iter_records(fp: IO[bytes]) -> Iterator[Record]:
+    """
+    Iterate the NEM12 records of an aseXML or bare CSV file.
+    """
+    return iter(Nem12Reader(fp))
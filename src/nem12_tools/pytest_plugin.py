@@ -0,0 +1,205 @@
+"""
+A pytest plugin providing generated NEM12 files to tests.
+
+The session-scoped ``nem12_fixture`` factory returns the aseXML bytes of a MeterDataNotification
+for a meter point, date range, interval length and seed. Results are memoised for the session
+and stored in a content-addressed cache directory (by default inside pytest's cache), so later
+runs with the same inputs skip generation. The key includes a hash of the generator sources, so
+entries are regenerated once the code that produced them changes. The least recently used
+entries are evicted at the end of the session once the cache exceeds ``--nem12-cache-max-bytes``.
+
+The plugin is registered through the ``pytest11`` entry point, so it is active wherever
+nem12_tools is installed.
+"""
+
+import dataclasses
+import datetime
+import functools
+import hashlib
+import importlib.metadata
+import json
+import os
+import pathlib
+import threading
+from collections.abc import Callable, Iterator
+from typing import cast
+
+import pytest
+from lxml import etree
+
+from nem12_tools import generators
+from nem12_tools.generators import nem12
+from nem12_tools.parsers.nmid import MeterPoint
+
+#: Bump to invalidate cached entries when the output of generate_nem12 changes for a reason
+#: outside nem12_tools.generators, whose sources are already part of every key.
+CACHE_VERSION = 1
+#: Default upper bound on the size of the on-disk cache.
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+_ENTRY_SUFFIX = ".xml"
+
+Nem12Factory = Callable[..., bytes]
+
+
+class Nem12FixtureCache:
+    """
+    Generated notifications keyed by a hash of their inputs, memoised in memory and optionally
+    persisted to ``directory``.
+    """
+
+    def __init__(self, directory: pathlib.Path | None, max_bytes: int = CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._memo: dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        meter_point: MeterPoint,
+        start: datetime.date,
+        end: datetime.date,
+        interval: nem12.IntervalLength = nem12.IntervalLength.FIVE_MINUTES,
+        seed: int = 0,
+    ) -> bytes:
+        key = cache_key(meter_point, start, end, interval, seed)
+        with self._lock:
+            if key in self._memo:
+                return self._memo[key]
+        content = self._read(key)
+        if content is None:
+            notification = nem12.generate_nem12(meter_point, start, end, interval, seed=seed)
+            content = etree.tostring(
+                notification.tree, pretty_print=True, xml_declaration=True, encoding="utf-8"
+            )
+            self._write(key, content)
+        with self._lock:
+            return self._memo.setdefault(key, content)
+
+    def evict(self) -> None:
+        """
+        Remove the least recently used entries until the cache is within ``max_bytes``.
+        """
+        if self.directory is None or not self.directory.is_dir():
+            return
+        entries = []
+        for path in self.directory.glob(f"*{_ENTRY_SUFFIX}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def _path(self, key: str) -> pathlib.Path | None:
+        return None if self.directory is None else self.directory / f"{key}{_ENTRY_SUFFIX}"
+
+    def _read(self, key: str) -> bytes | None:
+        path = self._path(key)
+        if path is None:
+            return None
+        try:
+            content = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        # Mark the entry as recently used for eviction.
+        os.utime(path)
+        return content
+
+    def _write(self, key: str, content: bytes) -> None:
+        path = self._path(key)
+        if path is None:
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        temporary.write_bytes(content)
+        os.replace(temporary, path)
+
+
+def cache_key(
+    meter_point: MeterPoint,
+    start: datetime.date,
+    end: datetime.date,
+    interval: nem12.IntervalLength,
+    seed: int,
+) -> str:
+    """
+    A hash of everything that determines the generated reads.
+    """
+    inputs = {
+        "cache_version": CACHE_VERSION,
+        "package_version": _package_version(),
+        "generators": _generators_digest(),
+        "meter_point": dataclasses.asdict(meter_point),
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "interval": interval.value,
+        "seed": seed,
+    }
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+
+def source_digest(directory: pathlib.Path) -> str:
+    """
+    A hash of the names and contents of the Python sources under ``directory``.
+    """
+    digest = hashlib.sha256()
+    for path in sorted(directory.rglob("*.py")):
+        content = path.read_bytes()
+        digest.update(f"{path.relative_to(directory).as_posix()}\0{len(content)}\0".encode())
+        digest.update(content)
+    return digest.hexdigest()
+
+
+@functools.cache
+def _generators_digest() -> str:
+    return source_digest(pathlib.Path(generators.__file__).parent)
+
+
+def _package_version() -> str:
+    try:
+        return importlib.metadata.version("nem12_tools")
+    except importlib.metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("nem12", "NEM12 fixtures")
+    group.addoption(
+        "--nem12-cache-dir",
+        type=pathlib.Path,
+        help="Directory for cached NEM12 fixtures. Default: inside the pytest cache.",
+    )
+    group.addoption(
+        "--nem12-cache-max-bytes",
+        type=int,
+        default=CACHE_MAX_BYTES,
+        help=f"Evict cached NEM12 fixtures beyond this size. Default: {CACHE_MAX_BYTES}",
+    )
+    group.addoption(
+        "--nem12-no-cache",
+        action="store_true",
+        help="Only memoise NEM12 fixtures in memory for this session.",
+    )
+
+
+@pytest.fixture(scope="session")
+def nem12_fixture(pytestconfig: pytest.Config) -> Iterator[Nem12Factory]:
+    """
+    Return ``get(meter_point, start, end, interval=FIVE_MINUTES, seed=0)``, giving the aseXML
+    bytes of a generated MeterDataNotification.
+    """
+    directory: pathlib.Path | None = None
+    if not pytestconfig.getoption("nem12_no_cache"):
+        directory = pytestconfig.getoption("nem12_cache_dir")
+        if directory is None and pytestconfig.cache is not None:
+            directory = pytestconfig.cache.mkdir("nem12")
+    max_bytes = cast(int, pytestconfig.getoption("nem12_cache_max_bytes"))
+    cache = Nem12FixtureCache(directory, max_bytes)
+    yield cache.get
+    cache.evict()
@@ -0,0 +1,220 @@
+"""
+Check that NEM12 files are internally consistent.
+
+Validation streams the file through ``Nem12Reader``, keeping only the state of the current
+200 block, so it runs in bounded memory regardless of file size.
+"""
+
+import dataclasses
+import datetime
+import re
+from collections.abc import Generator, Iterator
+from typing import IO
+
+from nem12_tools.parsers.nem12 import FileFormat, Nem12FormatError, Nem12Reader, Record
+
+_HEADER_FIELDS = (
+    "From",
+    "To",
+    "MessageID",
+    "MessageDate",
+    "TransactionGroup",
+    "Priority",
+    "Market",
+)
+_ELEMENT_PATH = ("aseXML", "Header", "Transactions", "Transaction", "MeterDataNotification")
+_INTERVAL_LENGTHS = {"5": 288, "15": 96, "30": 48}
+_QUALITY_METHODS = frozenset("ASFVNE")
+_READS_RE = re.compile(r"-?\d+(?:\.\d+)?(?:,-?\d+(?:\.\d+)?)*")
+_DATE_RE = re.compile(r"\d{8}")
+
+
+@dataclasses.dataclass(frozen=True)
+class Violation:
+    """
+    A problem found in a NEM12 file. Line 0 refers to the file as a whole.
+    """
+
+    line: int
+    message: str
+
+    def __str__(self) -> str:
+        return f"line {self.line}: {self.message}"
+
+
+@dataclasses.dataclass()
+class _Block:
+    """
+    The 200 record currently being validated.
+    """
+
+    nmi: str
+    nmi_configuration: str
+    intervals: int | None
+    last_read_date: datetime.date | None = None
+
+
+def validate(fp: IO[bytes]) -> Iterator[Violation]:
+    """
+    Validate an aseXML MeterDataNotification or bare NEM12 CSV file, yielding each violation.
+    """
+    reader = Nem12Reader(fp)
+    seen_header = False
+    terminator_line = 0
+    block: _Block | None = None
+    last_line = 0
+    records = iter(reader)
+    while True:
+        try:
+            record = next(records)
+        except StopIteration:
+            break
+        except Nem12FormatError as e:
+            yield Violation(e.line, e.message)
+            return
+
+        if not seen_header and reader.format is FileFormat.ASEXML:
+            yield from _validate_envelope(reader, record.line)
+        last_line = record.line
+        indicator = record.indicator
+
+        if terminator_line:
+            yield Violation(record.line, f"{indicator} record after 900 record")
+            continue
+        if not seen_header:
+            seen_header = True
+            if indicator != "100":
+                yield Violation(record.line, "File must start with a 100 record")
+            else:
+                yield from _validate_header(record)
+                continue
+
+        match indicator:
+            case "100":
+                yield Violation(record.line, "Duplicate 100 record")
+            case "200":
+                block = yield from _validate_nmi_details(record, block)
+            case "300":
+                if block is None:
+                    yield Violation(record.line, "300 record without a preceding 200 record")
+                else:
+                    yield from _validate_interval_data(record, block)
+            case "400" | "500":
+                if block is None:
+                    yield Violation(
+                        record.line, f"{indicator} record without a preceding 200 record"
+                    )
+            case "900":
+                terminator_line = record.line
+                if len(record.fields) != 1:
+                    yield Violation(record.line, "900 record must have no other fields")
+            case _:
+                yield Violation(record.line, f"Unknown record indicator {indicator!r}")
+
+    if not seen_header:
+        yield Violation(last_line, "File contains no NEM12 records")
+    elif not terminator_line:
+        yield Violation(last_line, "File must end with a 900 record")
+
+
+def _validate_envelope(reader: Nem12Reader, line: int) -> Iterator[Violation]:
+    elements = iter(reader.elements)
+    # Each element must appear, in order, somewhere before the CSVIntervalData.
+    for name in _ELEMENT_PATH:
+        if name not in elements:
+            yield Violation(line, f"CSVIntervalData is not nested within a {name} element")
+            break
+    for name in _HEADER_FIELDS:
+        if not reader.header.get(name):
+            yield Violation(0, f"aseXML Header is missing {name}")
+    if reader.header.get("TransactionGroup", "MTRD") != "MTRD":
+        yield Violation(0, "aseXML TransactionGroup must be MTRD")
+
+
+def _validate_header(record: Record) -> Iterator[Violation]:
+    fields = record.fields
+    if len(fields) != 5:
+        yield Violation(record.line, f"100 record must have 5 fields, found {len(fields)}")
+        return
+    if fields[1] != "NEM12":
+        yield Violation(record.line, f"Unsupported version {fields[1]!r}")
+    if not _is_datetime(fields[2], "%Y%m%d%H%M"):
+        yield Violation(record.line, f"Invalid DateTime {fields[2]!r}")
+
+
+def _validate_nmi_details(
+    record: Record, previous: _Block | None
+) -> Generator[Violation, None, _Block]:
+    """
+    Validate a 200 record, returning the block that subsequent 300 records belong to.
+    """
+    fields = record.fields
+    if len(fields) != 10:
+        yield Violation(record.line, f"200 record must have 10 fields, found {len(fields)}")
+        return _Block(nmi="", nmi_configuration="", intervals=None)
+
+    _, nmi, nmi_configuration, _, suffix, _, _, _, interval_length, _ = fields
+    intervals = _INTERVAL_LENGTHS.get(interval_length)
+    if intervals is None:
+        yield Violation(record.line, f"Invalid IntervalLength {interval_length!r}")
+    configuration = {nmi_configuration[i : i + 2] for i in range(0, len(nmi_configuration), 2)}
+    if suffix not in configuration:
+        yield Violation(
+            record.line,
+            f"NMISuffix {suffix!r} is not in NMIConfiguration {nmi_configuration!r}",
+        )
+    if previous and previous.nmi == nmi and previous.nmi_configuration != nmi_configuration:
+        yield Violation(
+            record.line,
+            f"NMIConfiguration {nmi_configuration!r} differs from "
+            f"{previous.nmi_configuration!r} for NMI {nmi}",
+        )
+    return _Block(nmi=nmi, nmi_configuration=nmi_configuration, intervals=intervals)
+
+
+def _validate_interval_data(record: Record, block: _Block) -> Iterator[Violation]:
+    fields = record.fields
+    read_date = fields[1] if len(fields) > 1 else ""
+    current = _parse_date(read_date)
+    if current is None:
+        yield Violation(record.line, f"Invalid IntervalDate {read_date!r}")
+    else:
+        if block.last_read_date is not None:
+            expected = block.last_read_date + datetime.timedelta(days=1)
+            if current != expected:
+                yield Violation(
+                    record.line,
+                    f"IntervalDate {read_date} out of sequence, expected {expected:%Y%m%d}",
+                )
+        block.last_read_date = current
+
+    if block.intervals is None:
+        return
+    if len(fields) != block.intervals + 7:
+        yield Violation(
+            record.line,
+            f"300 record must have {block.intervals} interval values, found {len(fields) - 7}",
+        )
+        return
+    if not _READS_RE.fullmatch(",".join(fields[2 : 2 + block.intervals])):
+        yield Violation(record.line, "Interval values must be numeric")
+    quality_method = fields[2 + block.intervals]
+    if quality_method[:1] not in _QUALITY_METHODS:
+        yield Violation(record.line, f"Invalid QualityMethod {quality_method!r}")
+
+
+def _parse_date(value: str) -> datetime.date | None:
+    if not _DATE_RE.fullmatch(value):
+        return None
+    try:
+        return datetime.date(int(value[:4]), int(value[4:6]), int(value[6:]))
+    except ValueError:
+        return None
+
+
+def _is_datetime(value: str, format: str) -> bool:
+    try:
+        datetime.datetime.strptime(value, format)
+    except ValueError:
+        return False
+    return True
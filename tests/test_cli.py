@@ -1,8 +1,13 @@
+import datetime
 import pathlib
+import sqlite3
 
 from click.testing import CliRunner
 
-from nem12_tools.cli import generate
+from nem12_tools.cli import diff, emit, fleet, generate, validate
+from nem12_tools.comparators.nem12 import diff as diff_nem12
+from nem12_tools.parsers.index import Nem12Index
+from nem12_tools.validators.nem12 import validate as validate_nem12
 
 
 def test_generate(tmp_path: pathlib.Path):
@@ -29,3 +34,183 @@ def test_generate(tmp_path: pathlib.Path):
     assert result.exit_code == 0, result.exception
     assert "NEM12 file generated successfully" in result.output
     assert output_file.read_text().startswith("<?xml")
+
+
+def test_generate_index(tmp_path: pathlib.Path):
+    nmi_discovery = pathlib.Path(__file__).parent.parent / "examples/nmi-discovery.xml"
+    runner = CliRunner()
+    output_file = tmp_path / "output.xml"
+    result = runner.invoke(
+        generate,
+        [str(nmi_discovery), str(output_file), "--from", "2021-01-01", "--to", "2021-01-02"],
+    )
+    assert result.exit_code == 0, result.exception
+    assert not (tmp_path / "output.xml.idx").exists()
+
+    result = runner.invoke(
+        generate,
+        [
+            str(nmi_discovery),
+            str(output_file),
+            "--from",
+            "2021-01-01",
+            "--to",
+            "2021-01-02",
+            "--index",
+        ],
+    )
+    assert result.exit_code == 0, result.exception
+    with Nem12Index(output_file) as index:
+        row = index.interval_data("4102335210", "E1", datetime.date(2021, 1, 2))
+    assert row[:2] == ["300", "20210102"]
+    assert len(row) == 295
+
+
+def test_generate_csv(tmp_path: pathlib.Path):
+    nmi_discovery = pathlib.Path(__file__).parent.parent / "examples/nmi-discovery.xml"
+    output_file = tmp_path / "output.csv"
+    runner = CliRunner()
+    result = runner.invoke(
+        generate,
+        [
+            str(nmi_discovery),
+            str(output_file),
+            "--from",
+            "2021-01-01",
+            "--to",
+            "2021-01-02",
+            "--format",
+            "csv",
+            "--index",
+        ],
+    )
+    assert result.exit_code == 0, result.exception
+    assert output_file.read_text().startswith("100,NEM12,")
+    with open(output_file, "rb") as output:
+        assert list(validate_nem12(output)) == []
+    with Nem12Index(output_file) as index:
+        assert index.interval_data("4102335210", "E1", datetime.date(2021, 1, 2))[0] == "300"
+
+
+def test_validate(tmp_path: pathlib.Path):
+    valid = tmp_path / "valid.csv"
+    valid.write_text("100,NEM12,202401010000,MDP,FRMP\n900\n")
+    invalid = tmp_path / "invalid.csv"
+    invalid.write_text("100,NEM12,202401010000,MDP,FRMP\n")
+    runner = CliRunner()
+
+    result = runner.invoke(validate, [str(valid)])
+    assert result.exit_code == 0, result.exception
+    assert "1 file(s) valid" in result.output
+
+    result = runner.invoke(validate, [str(valid), str(invalid)])
+    assert result.exit_code == 1
+    assert f"{invalid}:1: File must end with a 900 record" in result.output
+
+
+def test_diff(tmp_path: pathlib.Path):
+    old = tmp_path / "old.csv"
+    old.write_text(
+        "100,NEM12,202401010000,MDP,FRMP\n"
+        "200,4102335210,E1,E1,E1,,1,KWH,30,\n"
+        f"300,20240101,{','.join(['0.1000'] * 48)},A,,,20240101000000,20240101000000\n"
+        "900\n"
+    )
+    new = tmp_path / "new.csv"
+    new.write_text(old.read_text().replace("300,20240101,0.1000", "300,20240101,0.1500"))
+    runner = CliRunner()
+
+    result = runner.invoke(diff, [str(old), str(old)])
+    assert result.exit_code == 0, result.exception
+    assert "0 added, 0 removed, 0 changed" in result.output
+
+    result = runner.invoke(diff, [str(old), str(new)])
+    assert result.exit_code == 1
+    assert "~ 4102335210 E1 20240101" in result.output
+    assert "interval 1: 0.1000 -> 0.1500 (+0.0500)" in result.output
+
+
+def test_generate_parallel_seeded(tmp_path: pathlib.Path):
+    nmi_discovery = pathlib.Path(__file__).parent.parent / "examples/nmi-discovery.xml"
+    runner = CliRunner()
+    outputs = []
+    for name, workers in (
+        ("serial", ["--workers", "1"]),
+        ("processes", ["--workers", "2"]),
+        ("threads", ["--workers", "2", "--threads"]),
+    ):
+        output_file = tmp_path / f"output-{name}.xml"
+        args = ["--from", "2021-01-01", "--to", "2021-02-15", "--seed", "7", *workers]
+        result = runner.invoke(generate, [str(nmi_discovery), str(output_file), *args])
+        assert result.exit_code == 0, result.exception
+        outputs.append(output_file)
+    for output in outputs[1:]:
+        with open(outputs[0], "rb") as old, open(output, "rb") as new:
+            assert list(diff_nem12(old, new)) == []
+
+
+def test_fleet(tmp_path: pathlib.Path):
+    nmi_discovery = pathlib.Path(__file__).parent.parent / "examples/nmi-discovery.xml"
+    runner = CliRunner()
+    result = runner.invoke(
+        fleet,
+        [str(nmi_discovery), str(tmp_path), "--from", "2021-01-01", "--to", "2021-01-03"],
+    )
+    assert result.exit_code == 0, result.exception
+    assert "1 NEM12 file(s) generated successfully" in result.output
+    with open(tmp_path / "4102335210.xml", "rb") as output:
+        assert list(validate_nem12(output)) == []
+
+
+def test_emit(tmp_path: pathlib.Path):
+    nmi_discovery = pathlib.Path(__file__).parent.parent / "examples/nmi-discovery.xml"
+    runner = CliRunner()
+    spool_dir = tmp_path / "spool"
+    result = runner.invoke(emit, [str(nmi_discovery), str(spool_dir), "--count", "2"])
+    assert result.exit_code == 0, result.exception
+    assert "2 files" in result.output
+    assert len(list(spool_dir.iterdir())) == 2
+
+    result = runner.invoke(emit, [str(nmi_discovery), str(spool_dir)])
+    assert result.exit_code == 2
+
+
+def test_generate_sqlite(tmp_path: pathlib.Path):
+    nmi_discovery = pathlib.Path(__file__).parent.parent / "examples/nmi-discovery.xml"
+    database = tmp_path / "reads.db"
+    runner = CliRunner()
+    result = runner.invoke(
+        generate,
+        [
+            str(nmi_discovery),
+            str(tmp_path / "output.xml"),
+            "--from",
+            "2021-01-01",
+            "--to",
+            "2021-01-02",
+            "--sqlite",
+            str(database),
+            "--sqlite-layout",
+            "wide",
+        ],
+    )
+    assert result.exit_code == 0, result.exception
+    with sqlite3.connect(database) as connection:
+        assert connection.execute("SELECT COUNT(*) FROM interval_days").fetchone() == (2,)
+
+
+def test_generate_profile(tmp_path: pathlib.Path):
+    nmi_discovery = pathlib.Path(__file__).parent.parent / "examples/nmi-discovery.xml"
+    output_file = tmp_path / "output.xml"
+    runner = CliRunner()
+    args = [str(nmi_discovery), str(output_file), "--from", "2021-01-01", "--to", "2021-01-01"]
+
+    result = runner.invoke(generate, [*args, "--index", "--profile", "e1=flat:1.2"])
+    assert result.exit_code == 0, result.exception
+    with Nem12Index(output_file) as index:
+        row = index.interval_data("4102335210", "E1", datetime.date(2021, 1, 1))
+    assert set(row[2:290]) == {"0.1000"}
+
+    result = runner.invoke(generate, [*args, "--profile", "E1=wind"])
+    assert result.exit_code == 2
+    assert "Unknown profile 'wind'" in result.output
@@ -0,0 +1,58 @@
+from decimal import Decimal
+from io import BytesIO
+
+import pytest
+
+from nem12_tools.comparators.nem12 import Change, IntervalDelta, RowDiff, diff
+
+READS = ["0.1000", "0.2000", "0.3000"]
+
+
+def _file(*rows: tuple[str, str, str, list[str]]) -> BytesIO:
+    lines = ["100,NEM12,202401010000,MDP,FRMP"]
+    nmi_suffix = None
+    for nmi, suffix, read_date, reads in rows:
+        if (nmi, suffix) != nmi_suffix:
+            lines.append(f"200,{nmi},E1B1,{suffix},{suffix},,1,KWH,30,")
+            nmi_suffix = (nmi, suffix)
+        lines.append(f"300,{read_date},{','.join(reads)},A,,,20240101000000,20240101000000")
+    lines.append("900")
+    return BytesIO("\n".join(lines).encode() + b"\n")
+
+
+@pytest.mark.parametrize("run_size", [1, 2, 1000])
+def test_diff(run_size: int):
+    old = _file(
+        ("4102335210", "E1", "20240101", READS),
+        ("4102335210", "E1", "20240102", READS),
+        ("4102335210", "B1", "20240101", READS),
+    )
+    new = _file(
+        ("4102335210", "B1", "20240101", READS),
+        ("4102335210", "E1", "20240102", ["0.1000", "0.2500", "0.3000"]),
+        ("4102335210", "E1", "20240103", READS),
+    )
+    assert list(diff(old, new, run_size=run_size)) == [
+        RowDiff(Change.REMOVED, "4102335210", "E1", "20240101"),
+        RowDiff(
+            Change.CHANGED,
+            "4102335210",
+            "E1",
+            "20240102",
+            old_quality="A",
+            new_quality="A",
+            deltas=(IntervalDelta(2, Decimal("0.2000"), Decimal("0.2500")),),
+        ),
+        RowDiff(Change.ADDED, "4102335210", "E1", "20240103"),
+    ]
+
+
+def test_identical_reads_ignore_timestamps():
+    old = _file(("4102335210", "E1", "20240101", READS))
+    new = BytesIO(old.getvalue().replace(b"20240101000000", b"20240909000000"))
+    assert list(diff(old, new)) == []
+
+
+def test_interval_delta():
+    assert IntervalDelta(1, Decimal("0.5"), Decimal("0.2")).delta == Decimal("-0.3")
+    assert IntervalDelta(1, Decimal("0.5"), None).delta is None
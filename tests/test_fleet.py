@@ -0,0 +1,152 @@
+import array
+import datetime
+
+import pytest
+
+from nem12_tools.generators import fleet, nem12, profiles
+from nem12_tools.parsers.nmid import Meter, MeterPoint, Register
+
+NOW = datetime.datetime(2024, 9, 3, 12, 34, 56)
+
+
+def _meter_point(nmi: str) -> MeterPoint:
+    return MeterPoint(
+        nmi=nmi,
+        role_mdp="ACTIVMDP",
+        role_frmp="ENERGEX",
+        meters=[
+            Meter(
+                serial_number="701226207",
+                registers=[
+                    Register(register_id="E1", uom="KWH", suffix="E1"),
+                    Register(register_id="B1", uom="KWH", suffix="B1"),
+                ],
+            )
+        ],
+    )
+
+
+def _produce(nmis: list[str], seed: int = 1) -> dict[str, nem12.Nem12Data]:
+    data = fleet.produce_fleet_data(
+        [_meter_point(nmi) for nmi in nmis],
+        datetime.date(2024, 1, 1),
+        datetime.date(2024, 1, 14),
+        nem12.IntervalLength.THIRTY_MINUTES,
+        NOW,
+        seed=seed,
+    )
+    return {meter_point.nmi: nem_12_data for meter_point, nem_12_data in data}
+
+
+def test_fleet_data_shape():
+    data = _produce(["4102335210", "4102335211"])
+    assert list(data) == ["4102335210", "4102335211"]
+    nmi_details, block = data["4102335210"].read_data[1]
+    assert nmi_details.register_suffix == "B1"
+    assert nmi_details.nmi_configuration == "E1B1"
+    assert block.start == datetime.date(2024, 1, 1)
+    assert len(block) == 14
+    assert len(block.values) == 14 * 48
+    assert min(block.values) >= 0
+
+
+def test_fleet_is_deterministic_per_nmi():
+    pair = _produce(["4102335210", "4102335211"])
+    single = _produce(["4102335211"])
+    assert pair["4102335211"].read_data[0][1].values == single["4102335211"].read_data[0][1].values
+    assert pair["4102335210"].read_data[0][1].values != pair["4102335211"].read_data[0][1].values
+    assert _produce(["4102335211"], seed=2) != single
+
+
+def test_fleet_peaks_in_the_evening():
+    data = _produce([f"41023352{i:02d}" for i in range(20)])
+    totals = [
+        sum(sum(nem_12_data.read_data[0][1].values[i::48]) for nem_12_data in data.values())
+        for i in range(48)
+    ]
+    peak = totals.index(max(totals))
+    # Half hour intervals; the fleet peak lands in the evening.
+    assert 36 <= peak <= 42
+
+
+def test_fleet_transaction_ids_are_unique():
+    def ids() -> set[str]:
+        notifications = fleet.generate_fleet(
+            [_meter_point(f"41023352{i:02d}") for i in range(5)],
+            datetime.date(2024, 1, 1),
+            datetime.date(2024, 1, 1),
+            nem12.IntervalLength.THIRTY_MINUTES,
+            seed=1,
+        )
+        message_ids = set()
+        for _, notification in notifications:
+            message_id = notification.root.findtext("./Header/MessageID")
+            assert message_id is not None and len(message_id) <= 36
+            assert notification.root.find(".//Transaction").get("transactionID") == message_id
+            message_ids.add(message_id)
+        return message_ids
+
+    first, second = ids(), ids()
+    assert len(first) == len(second) == 5
+    # Each run has its own ID, so runs started at the same moment do not collide.
+    assert not first & second
+
+
+def test_fleet_export_follows_solar_profile():
+    data = _produce(["4102335210", "4102335211"])
+    for nem_12_data in data.values():
+        (consumption, consumption_block), (export, export_block) = nem_12_data.read_data
+        assert (consumption.register_suffix, export.register_suffix) == ("E1", "B1")
+        assert export_block.values != consumption_block.values
+        totals = [sum(export_block.values[i::48]) for i in range(48)]
+        # Nothing overnight, with the peak around midday.
+        assert not any(totals[:12]) and not any(totals[36:])
+        assert 20 <= totals.index(max(totals)) <= 27
+
+
+def test_fleet_profiles():
+    consumption = profiles.ConsumptionProfile(min_value=0.2, max_value=0.4, mode=0.3)
+    data = fleet.produce_fleet_data(
+        [_meter_point("4102335210")],
+        datetime.date(2024, 1, 1),
+        datetime.date(2024, 1, 14),
+        nem12.IntervalLength.THIRTY_MINUTES,
+        NOW,
+        seed=1,
+        register_profiles={"E1": consumption, "B1": profiles.FlatProfile(kw=1)},
+    )
+    ((_, nem_12_data),) = data
+    (_, consumption_block), (_, export_block) = nem_12_data.read_data
+    # Providers chosen by the caller are used as they are, not varied with the fleet.
+    assert consumption_block.values == consumption.reads(
+        profiles.ProfileRequest(
+            seed=1,
+            nmi="4102335210",
+            register_suffix="E1",
+            uom="KWH",
+            start=datetime.date(2024, 1, 1),
+            days=14,
+            intervals=48,
+        )
+    )
+    assert set(export_block.values) == {5_000}
+
+
+def test_fleet_daily_factor_is_shared():
+    factors = fleet.FleetFactors.generate(
+        datetime.date(2024, 1, 1),
+        datetime.date(2024, 1, 14),
+        nem12.IntervalLength.THIRTY_MINUTES,
+        seed=1,
+    )
+    # Dividing out the daily factor, weekend uplift included, leaves the same shape every day.
+    shape = [demand / factors.daily[0] for demand in factors.shared[:48]]
+    for day in range(factors.days):
+        for demand, expected in zip(factors.shared[day * 48 :][:48], shape):
+            assert demand / factors.daily[day] == pytest.approx(expected)
+
+    # So varying that shape with the fleet reproduces the fleet's own consumption.
+    reads = array.array("q", [round(demand * 0.5 * nem12.READ_SCALE) for demand in shape])
+    modulated = factors.modulate("4102335210", "E1", reads * factors.days)
+    consumption = factors.register_reads("4102335210", "E1")
+    assert list(modulated) == pytest.approx(list(consumption), rel=1e-3, abs=2)
@@ -1,13 +1,17 @@
+import array
 import csv
 import datetime
 import zoneinfo
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from decimal import Decimal
 from io import BytesIO
 from unittest import mock
 
+import pytest
 from lxml import etree
 
 from nem12_tools.generators import nem12
+from nem12_tools.parsers.index import Nem12Index, write_index
 from nem12_tools.parsers.nmid import Meter, MeterPoint, Register
 
 
@@ -30,6 +34,7 @@ def test_nem12():
     root = etree.fromstring(xml_file.getvalue())
     assert root.findtext("./Header/From") == "ACTIVMDP"
     assert root.findtext("./Header/To") == "ENERGEX"
+    assert root.findtext("./Header/MessageID", "").startswith("MTRD_MSG_NEM12_")
     assert root.findtext("./Header/TransactionGroup") == "MTRD"
     assert root.findtext("./Header/Priority") == "Medium"
     assert root.findtext("./Header/Market") == "NEM"
@@ -174,6 +179,54 @@ class TestIntervalData:
         )
 
 
+class TestIntervalBlock:
+    def _block(self) -> nem12.IntervalBlock:
+        now = datetime.datetime(2024, 9, 3, 12, 34, 56)
+        return nem12.IntervalBlock(
+            start=now.date(),
+            intervals=2,
+            values=array.array("q", [10000, 500, 0, 123456]),
+            quality_method=nem12.QualityMethod.ACTUAL,
+            last_updated=now,
+            msats_load_time=now,
+        )
+
+    def test_emits_rows(self):
+        now_formatted = "20240903123456"
+        assert list(self._block().as_rows()) == [
+            ("300", "20240903", "1.0000", "0.0500", "A", "", "", now_formatted, now_formatted),
+            ("300", "20240904", "0.0000", "12.3456", "A", "", "", now_formatted, now_formatted),
+        ]
+
+    def test_materialises_interval_data(self):
+        block = self._block()
+        assert len(block) == 2
+        day = block[-1]
+        assert day.read_date == datetime.date(2024, 9, 4)
+        assert day.read_values == (Decimal("0.0000"), Decimal("12.3456"))
+        assert day.as_row() == next(reversed(list(block.as_rows())))
+        assert block.day_reads(1) == array.array("q", [0, 123456])
+
+    def test_rejects_partial_day(self):
+        now = datetime.datetime(2024, 9, 3, 12, 34, 56)
+        with pytest.raises(ValueError):
+            nem12.IntervalBlock(
+                start=now.date(),
+                intervals=2,
+                values=array.array("q", [1, 2, 3]),
+                quality_method=nem12.QualityMethod.ACTUAL,
+                last_updated=now,
+                msats_load_time=now,
+            )
+
+
+def test_format_read():
+    assert nem12.format_read(0) == "0.0000"
+    assert nem12.format_read(7) == "0.0007"
+    assert nem12.format_read(123456) == "12.3456"
+    assert nem12.format_read(-5) == "-0.0005"
+
+
 class TestTerminator:
     def test_emits_row(self):
         terminator = nem12.Terminator()
@@ -339,3 +392,156 @@ class TestProduceNem12Data:
             for value in interval.read_values:
                 assert len(str(value).split(".")[0]) == 1
                 assert len(str(value).split(".")[1]) == 4
+
+
+def test_write_xml_with_index(tmp_path):
+    m = MeterPoint(
+        nmi="4102335210",
+        role_mdp="ACTIVMDP",
+        role_frmp="ENERGEX",
+        meters=[
+            Meter(
+                serial_number="701226207",
+                registers=[Register(register_id="E1", uom="KWH", suffix="E1")],
+            )
+        ],
+    )
+    notification = nem12.generate_nem12(
+        m, start=datetime.date(2024, 1, 1), end=datetime.date(2024, 1, 2)
+    )
+    output = tmp_path / "nem12.xml"
+    notification.write_xml(str(output), index=True)
+
+    with Nem12Index(output) as index:
+        assert index.nmi_details("4102335210", "E1")[0] == "200"
+        assert index.interval_data("4102335210", "E1", datetime.date(2024, 1, 2))[1] == "20240102"
+
+
+def test_write_csv(tmp_path):
+    m = MeterPoint(
+        nmi="4102335210",
+        role_mdp="ACTIVMDP",
+        role_frmp="ENERGEX",
+        meters=[
+            Meter(
+                serial_number="701226207",
+                registers=[
+                    Register(register_id="E1", uom="KWH", suffix="E1"),
+                    Register(register_id="B1", uom="KWH", suffix="B1"),
+                ],
+            )
+        ],
+    )
+    now = datetime.datetime(2024, 9, 3, 12, 34, 56, tzinfo=zoneinfo.ZoneInfo("Etc/GMT-10"))
+    data = nem12.produce_nem12_data(
+        m,
+        datetime.date(2024, 1, 1),
+        datetime.date(2024, 1, 5),
+        nem12.IntervalLength.FIVE_MINUTES,
+        now,
+    )
+    output = BytesIO()
+    # A small buffer writes the rows across several chunks.
+    nem12.write_csv(data, output, buffer_size=4096)
+
+    notification = nem12.build_notification(m, data, now, message_id="MTRD_MSG_NEM12_TEST")
+    assert output.getvalue().decode() == notification.root.findtext(".//CSVIntervalData")
+    assert notification.root.findtext("./Header/MessageID") == "MTRD_MSG_NEM12_TEST"
+    assert notification.root.find(".//Transaction").get("transactionID") == "MTRD_MSG_NEM12_TEST"
+    lines = output.getvalue().decode().splitlines()
+    assert [line[:3] for line in lines] == ["100", "200", *["300"] * 5, "200", *["300"] * 5, "900"]
+
+    path = tmp_path / "nem12.csv"
+    with open(path, "wb") as csv_file:
+        nem12.generate_nem12_csv(
+            m, csv_file, datetime.date(2024, 1, 1), datetime.date(2024, 1, 2), seed=1
+        )
+    write_index(path)
+    with Nem12Index(path) as index:
+        assert index.interval_data("4102335210", "B1", datetime.date(2024, 1, 2))[1] == "20240102"
+
+
+class TestParallelGeneration:
+    meter_point = MeterPoint(
+        nmi="4102335210",
+        role_mdp="ACTIVMDP",
+        role_frmp="ENERGEX",
+        meters=[
+            Meter(
+                serial_number="701226207",
+                registers=[
+                    Register(register_id="E1", uom="KWH", suffix="E1"),
+                    Register(register_id="B1", uom="KWH", suffix="B1"),
+                ],
+            )
+        ],
+    )
+
+    def _reads(self, **kwargs) -> list[tuple[str, array.array]]:
+        now = datetime.datetime(2024, 9, 3, 12, 34, 56)
+        data = nem12.produce_nem12_data(
+            self.meter_point,
+            datetime.date(2024, 1, 1),
+            datetime.date(2024, 3, 1),
+            nem12.IntervalLength.THIRTY_MINUTES,
+            now,
+            **kwargs,
+        )
+        return [(details.register_suffix, block.values) for details, block in data.read_data]
+
+    def test_deterministic_regardless_of_executor(self):
+        expected = self._reads(seed=42)
+        assert [suffix for suffix, _ in expected] == ["E1", "B1"]
+        assert all(len(values) == 61 * 48 for _, values in expected)
+        assert self._reads(seed=42, chunk_days=1) == expected
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            assert self._reads(seed=42, executor=executor, chunk_days=7) == expected
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            assert self._reads(seed=42, executor=executor) == expected
+
+    def test_seed_changes_reads(self):
+        assert self._reads(seed=1) != self._reads(seed=2)
+
+    def test_identical_under_concurrent_threads(self):
+        now = datetime.datetime(2024, 9, 3, 12, 34, 56)
+
+        def rows(seed: int) -> list[tuple[str, ...]]:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                data = nem12.produce_nem12_data(
+                    self.meter_point,
+                    datetime.date(2024, 1, 1),
+                    datetime.date(2024, 2, 1),
+                    nem12.IntervalLength.THIRTY_MINUTES,
+                    now,
+                    seed=seed,
+                    executor=executor,
+                    chunk_days=3,
+                )
+            return list(data.rows())
+
+        seeds = [1, 2, 3, 4] * 4
+        expected = {seed: rows(seed) for seed in set(seeds)}
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(rows, seeds))
+        assert results == [expected[seed] for seed in seeds]
+
+    def test_notifications_under_concurrent_threads(self):
+        def generate(seed: int) -> bytes:
+            notification = nem12.generate_nem12(
+                self.meter_point,
+                datetime.date(2024, 1, 1),
+                datetime.date(2024, 1, 2),
+                nem12.IntervalLength.THIRTY_MINUTES,
+                seed=seed,
+            )
+            return etree.tostring(notification.root)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(generate, [5] * 16))
+        # Generation times differ between calls, so compare the read values of the 300 rows.
+        reads = set()
+        for result in results:
+            csv_data = etree.fromstring(result).findtext(".//CSVIntervalData") or ""
+            rows = csv.reader(csv_data.splitlines())
+            reads.add(tuple(tuple(row[:-5]) for row in rows if row[0] == "300"))
+        assert len(reads) == 1
@@ -1,6 +1,11 @@
+import datetime
 import os
+import pathlib
+from io import BytesIO
 
-from nem12_tools.parsers import nmid
+import pytest
+
+from nem12_tools.parsers import index, nem12, nmid
 
 
 def test_nmidiscovery_parsed():
@@ -18,3 +23,101 @@ def test_nmidiscovery_parsed():
     assert register.register_id == "E1"
     assert register.uom == "KWH"
     assert register.suffix == "E1"
+
+
+def test_nem12_records_from_asexml():
+    xml = (
+        b"<?xml version='1.0' encoding='UTF-8'?>\n"
+        b"<aseXML>\n"
+        b"  <Header><From>A&amp;B</From></Header>\n"
+        b"  <CSVIntervalData>100,NEM12,202401010000,A&amp;B,FRMP\n"
+        b"900\n"
+        b"</CSVIntervalData>\n"
+        b"</aseXML>\n"
+    )
+    reader = nem12.Nem12Reader(BytesIO(xml))
+    records = list(reader)
+    assert reader.format == nem12.FileFormat.ASEXML
+    assert reader.header == {"From": "A&B"}
+    assert [r.fields for r in records] == [
+        ["100", "NEM12", "202401010000", "A&B", "FRMP"],
+        ["900"],
+    ]
+    assert [r.line for r in records] == [4, 5]
+    assert xml[records[0].offset :].startswith(b"100,")
+    assert xml[records[1].offset :].startswith(b"900\n")
+
+
+def test_nem12_records_from_csv():
+    data = b"100,NEM12,202401010000,MDP,FRMP\r\n\r\n900\r\n"
+    reader = nem12.Nem12Reader(BytesIO(data))
+    records = list(reader)
+    assert reader.format == nem12.FileFormat.CSV
+    assert [(r.line, r.offset, r.indicator) for r in records] == [(1, 0, "100"), (3, 35, "900")]
+
+
+def test_index(tmp_path: pathlib.Path):
+    data = tmp_path / "nem12.xml"
+    data.write_bytes(
+        b"<aseXML>\n"
+        b"  <CSVIntervalData>100,NEM12,202401010000,MDP,FRMP\n"
+        b"200,4102335210,E1B1,E1,E1,,1,KWH,30,\n"
+        b"300,20240101,0.1000,A,,,20240101000000,20240101000000\n"
+        b"300,20240102,0.2000,A,,,20240101000000,20240101000000\n"
+        b"200,4102335210,E1B1,B1,B1,,1,KWH,30,\n"
+        b"300,20240101,0.3000,A,,,20240101000000,20240101000000\n"
+        b"900</CSVIntervalData>\n"
+        b"</aseXML>\n"
+    )
+    assert index.write_index(data) == tmp_path / "nem12.xml.idx"
+
+    with index.Nem12Index(data) as nem12_index:
+        assert nem12_index.nmi_details("4102335210", "B1")[:5] == [
+            "200",
+            "4102335210",
+            "E1B1",
+            "B1",
+            "B1",
+        ]
+        assert nem12_index.interval_data("4102335210", "E1", datetime.date(2024, 1, 2))[:3] == [
+            "300",
+            "20240102",
+            "0.2000",
+        ]
+        rows = nem12_index.interval_range(
+            "4102335210", "E1", datetime.date(2023, 12, 31), datetime.date(2024, 1, 5)
+        )
+        assert [row[1] for row in rows] == ["20240101", "20240102"]
+        with pytest.raises(KeyError):
+            nem12_index.interval_data("4102335210", "B1", datetime.date(2024, 1, 2))
+
+
+def test_index_lookups(tmp_path: pathlib.Path):
+    data = tmp_path / "nem12.csv"
+    nmis = [f"41023352{i:02d}" for i in reversed(range(20))]
+    with open(data, "w") as nem12_file:
+        nem12_file.write("100,NEM12,202401010000,MDP,FRMP\n")
+        for nmi in nmis:
+            nem12_file.write(f"200,{nmi},E1,E1,E1,,1,KWH,30,\n")
+            for day in range(1, 11):
+                nem12_file.write(f"300,202401{day:02d},{day}.0,A,,,20240101000000,\n")
+        nem12_file.write("900\n")
+    path = index.write_index(data)
+    # A fixed-width entry per 200 and 300 row after the header.
+    assert path.stat().st_size == 8 + 32 * len(nmis) * 11
+
+    with index.Nem12Index(data) as nem12_index:
+        for nmi in nmis:
+            assert nem12_index.nmi_details(nmi, "E1")[1] == nmi
+            assert nem12_index.interval_data(nmi, "E1", datetime.date(2024, 1, 10))[2] == "10.0"
+        rows = nem12_index.interval_range(
+            "4102335207", "E1", datetime.date(2024, 1, 9), datetime.date(2024, 2, 1)
+        )
+        assert [row[1] for row in rows] == ["20240109", "20240110"]
+        assert ("4102335219", "E1", "20240101") in nem12_index
+        assert ("4102335220", "E1", "20240101") not in nem12_index
+        assert ("41023352100", "E1", "") not in nem12_index
+
+    path.write_text("nmi,register_suffix,read_date,offset,length\n")
+    with pytest.raises(ValueError, match="not a NEM12 index"):
+        index.Nem12Index(data)
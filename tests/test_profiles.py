@@ -0,0 +1,170 @@
+import array
+import datetime
+import pathlib
+import subprocess
+import sys
+
+import pytest
+
+from nem12_tools.generators import nem12, profiles
+from nem12_tools.parsers.nmid import Meter, MeterPoint, Register
+
+
+def _request(days: int = 3, intervals: int = 48, suffix: str = "E1") -> profiles.ProfileRequest:
+    return profiles.ProfileRequest(
+        seed=1,
+        nmi="4102335210",
+        register_suffix=suffix,
+        uom="KWH",
+        start=datetime.date(2024, 1, 1),
+        days=days,
+        intervals=intervals,
+    )
+
+
+@pytest.mark.parametrize(
+    "statement",
+    [
+        "import nem12_tools.generators.profiles",
+        "from nem12_tools.generators.profiles import CsvTemplateProfile",
+    ],
+)
+def test_imports_alone(statement: str):
+    # A fresh interpreter, so no other generator module has been imported first.
+    subprocess.run([sys.executable, "-c", statement], check=True)
+
+
+@pytest.mark.parametrize(
+    "register, expected",
+    [
+        (Register(register_id="E1", uom="KWH", suffix="E1"), profiles.ConsumptionProfile()),
+        (Register(register_id="B1", uom="KWH", suffix="B1"), profiles.SolarExportProfile()),
+        (Register(register_id="Q1", uom="KVARH", suffix="Q1"), profiles.FlatProfile(kw=0.1)),
+        (Register(register_id="X1", uom="KWH", suffix="X1"), profiles.ConsumptionProfile()),
+    ],
+)
+def test_select_default_profile(register: Register, expected: profiles.ProfileProvider):
+    assert profiles.select_profile(register) == expected
+
+
+def test_select_most_specific_profile():
+    flat, solar = profiles.FlatProfile(kw=1), profiles.SolarExportProfile(peak_kw=5)
+    register = Register(register_id="E1", uom="KWH", suffix="E1")
+    assert profiles.select_profile(register, {"KWH": flat}) == flat
+    assert profiles.select_profile(register, {"KWH": flat, "E": solar}) == solar
+    assert profiles.select_profile(register, {"E1": flat, "E": solar}) == flat
+
+
+def test_consumption_is_independent_of_chunking():
+    request = _request(days=4)
+    whole = profiles.ConsumptionProfile().reads(request)
+    assert len(whole) == 4 * 48
+    tail = profiles.ConsumptionProfile().reads(
+        profiles.ProfileRequest(**{**vars(request), "start": datetime.date(2024, 1, 3), "days": 2})
+    )
+    assert whole[2 * 48 :] == tail
+
+
+def test_solar_export_is_zero_overnight():
+    reads = profiles.SolarExportProfile().reads(_request(days=2, suffix="B1"))
+    for day in range(2):
+        day_reads = reads[day * 48 : (day + 1) * 48]
+        assert not any(day_reads[:12]) and not any(day_reads[36:])
+        assert max(day_reads) == max(day_reads[22:26])
+        assert max(day_reads) <= 1.5 * nem12.READ_SCALE
+
+
+def test_flat():
+    reads = profiles.FlatProfile(kw=2).reads(_request(days=2, intervals=288))
+    assert list(reads) == [round(2 / 12 * nem12.READ_SCALE)] * 576
+
+
+def test_csv_template(tmp_path: pathlib.Path):
+    template = tmp_path / "template.csv"
+    template.write_text("\n".join(",".join([str(row + 1)] * 48) for row in range(2)) + "\n")
+    provider = profiles.CsvTemplateProfile(template)
+
+    reads = provider.reads(_request(days=3))
+    assert reads[::48].tolist() == [10_000, 20_000, 10_000]
+    # Summed into longer intervals
+    assert provider.reads(_request(days=1, intervals=24)).tolist() == [20_000] * 24
+    # Split evenly into shorter intervals
+    assert provider.reads(_request(days=1, intervals=144)).tolist() == [3334, 3333, 3333] * 48
+
+    template.write_text(",".join(["0.5"] * 48) + "\n")
+    assert provider.reads(_request(days=1)).tolist() == [5000] * 48
+
+
+def test_csv_template_errors(tmp_path: pathlib.Path):
+    template = tmp_path / "template.csv"
+    template.write_text("1,2,3,4,5,6,7\n")
+    with pytest.raises(ValueError, match="do not divide a day"):
+        profiles.CsvTemplateProfile(template).reads(_request())
+    template.write_text("1,1\n1,1,1\n")
+    with pytest.raises(ValueError, match="expected 2 reads, got 3"):
+        profiles.CsvTemplateProfile(template).reads(_request())
+
+
+def test_parse_profile(tmp_path: pathlib.Path):
+    assert profiles.parse_profile("solar") == profiles.SolarExportProfile()
+    assert profiles.parse_profile("flat:1.5") == profiles.FlatProfile(kw=1.5)
+    template = tmp_path / "template.csv"
+    template.write_text("1\n")
+    assert profiles.parse_profile(str(template)) == profiles.CsvTemplateProfile(template)
+    with pytest.raises(ValueError, match="Unknown profile"):
+        profiles.parse_profile("wind")
+
+
+class _Short(profiles.ProfileProvider):
+    def reads(self, request: profiles.ProfileRequest) -> array.array:
+        return array.array("q", [0])
+
+
+def test_produce_with_profiles():
+    meter_point = MeterPoint(
+        nmi="4102335210",
+        role_mdp="ACTIVMDP",
+        role_frmp="ENERGEX",
+        meters=[
+            Meter(
+                serial_number="701226207",
+                registers=[
+                    Register(register_id="E1", uom="KWH", suffix="E1"),
+                    Register(register_id="B1", uom="KWH", suffix="B1"),
+                ],
+            )
+        ],
+    )
+    now = datetime.datetime(2024, 9, 3, 12, 34, 56)
+    data = nem12.produce_nem12_data(
+        meter_point,
+        datetime.date(2024, 1, 1),
+        datetime.date(2024, 1, 2),
+        nem12.IntervalLength.THIRTY_MINUTES,
+        now,
+        seed=1,
+        register_profiles={"E1": profiles.FlatProfile(kw=1)},
+    )
+    (_, consumption), (_, export) = data.read_data
+    assert list(consumption.values) == [5000] * 96
+    assert export.values == profiles.SolarExportProfile().reads(
+        profiles.ProfileRequest(
+            seed=1,
+            nmi="4102335210",
+            register_suffix="B1",
+            uom="KWH",
+            start=datetime.date(2024, 1, 1),
+            days=2,
+            intervals=48,
+        )
+    )
+
+    with pytest.raises(ValueError, match="_Short returned 1 reads, expected 48"):
+        nem12.produce_nem12_data(
+            meter_point,
+            datetime.date(2024, 1, 1),
+            datetime.date(2024, 1, 1),
+            nem12.IntervalLength.THIRTY_MINUTES,
+            now,
+            register_profiles={"E": _Short()},
+        )
@@ -0,0 +1,78 @@
+import datetime
+import os
+import pathlib
+
+import pytest
+from lxml import etree
+
+from nem12_tools.generators import nem12
+from nem12_tools.parsers.nmid import Meter, MeterPoint, Register
+from nem12_tools import pytest_plugin
+from nem12_tools.pytest_plugin import Nem12Factory, Nem12FixtureCache, cache_key, source_digest
+
+METER_POINT = MeterPoint(
+    nmi="4102335210",
+    role_mdp="ACTIVMDP",
+    role_frmp="ENERGEX",
+    meters=[
+        Meter(
+            serial_number="701226207",
+            registers=[Register(register_id="E1", uom="KWH", suffix="E1")],
+        )
+    ],
+)
+START = datetime.date(2024, 1, 1)
+END = datetime.date(2024, 1, 2)
+
+
+def test_nem12_fixture(nem12_fixture: Nem12Factory):
+    content = nem12_fixture(METER_POINT, START, END, nem12.IntervalLength.THIRTY_MINUTES, 1)
+    root = etree.fromstring(content)
+    assert root.findtext("./Header/From") == "ACTIVMDP"
+    assert (
+        nem12_fixture(METER_POINT, START, END, nem12.IntervalLength.THIRTY_MINUTES, 1) is content
+    )
+
+
+def test_persists_by_inputs(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch):
+    first = Nem12FixtureCache(tmp_path).get(METER_POINT, START, END, seed=1)
+    assert len(list(tmp_path.glob("*.xml"))) == 1
+
+    # A new session reads the stored entry instead of generating again.
+    def fail(*args, **kwargs):
+        raise AssertionError("generated")
+
+    monkeypatch.setattr(nem12, "generate_nem12", fail)
+    assert Nem12FixtureCache(tmp_path).get(METER_POINT, START, END, seed=1) == first
+    with pytest.raises(AssertionError, match="generated"):
+        Nem12FixtureCache(tmp_path).get(METER_POINT, START, END, seed=2)
+
+
+def test_memory_only():
+    cache = Nem12FixtureCache(None)
+    content = cache.get(METER_POINT, START, START, seed=1)
+    assert cache.get(METER_POINT, START, START, seed=1) is content
+
+
+def test_evicts_least_recently_used(tmp_path: pathlib.Path):
+    cache = Nem12FixtureCache(tmp_path)
+    for seed in range(3):
+        cache.get(METER_POINT, START, START, seed=seed)
+    entries = sorted(tmp_path.glob("*.xml"))
+    sizes = {path: path.stat().st_size for path in entries}
+    for age, path in enumerate(entries):
+        os.utime(path, (1_000_000 + age, 1_000_000 + age))
+
+    Nem12FixtureCache(tmp_path, max_bytes=sum(sizes.values()) - 1).evict()
+    assert sorted(tmp_path.glob("*.xml")) == entries[1:]
+
+
+def test_key_follows_generator_sources(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch):
+    (tmp_path / "nem12.py").write_text("READS = 1\n")
+    digest = source_digest(tmp_path)
+    (tmp_path / "nem12.py").write_text("READS = 2\n")
+    assert source_digest(tmp_path) != digest
+
+    key = cache_key(METER_POINT, START, END, nem12.IntervalLength.FIVE_MINUTES, 1)
+    monkeypatch.setattr(pytest_plugin, "_generators_digest", lambda: digest)
+    assert cache_key(METER_POINT, START, END, nem12.IntervalLength.FIVE_MINUTES, 1) != key
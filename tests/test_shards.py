@@ -0,0 +1,112 @@
+import json
+import pathlib
+
+import pytest
+from click.testing import CliRunner
+from lxml import etree
+
+from nem12_tools.cli import fleet, merge
+from nem12_tools.generators import shards
+from nem12_tools.validators.nem12 import validate
+
+NMI_DISCOVERY = (pathlib.Path(__file__).parent.parent / "examples/nmi-discovery.xml").read_text()
+NMIS = [f"41023352{i:02d}" for i in range(12)]
+
+
+def test_shard_parse():
+    assert shards.Shard.parse("2/4") == shards.Shard(index=2, count=4)
+    for invalid in ("0/4", "5/4", "4", "a/b"):
+        with pytest.raises(ValueError):
+            shards.Shard.parse(invalid)
+
+
+def test_shard_index_is_stable_and_partitions():
+    assert [shards.shard_index(nmi, 3) for nmi in NMIS[:4]] == [
+        shards.shard_index(nmi, 3) for nmi in NMIS[:4]
+    ]
+    assigned = [
+        [nmi for nmi in NMIS if shards.Shard(index=i, count=3).includes(nmi)] for i in (1, 2, 3)
+    ]
+    assert sorted(nmi for shard in assigned for nmi in shard) == NMIS
+    assert all(assigned)
+
+
+@pytest.fixture
+def sharded_fleet(tmp_path: pathlib.Path) -> list[pathlib.Path]:
+    inputs = []
+    for nmi in NMIS:
+        path = tmp_path / "input" / f"{nmi}.xml"
+        path.parent.mkdir(exist_ok=True)
+        path.write_text(NMI_DISCOVERY.replace("4102335210", nmi))
+        inputs.append(str(path))
+    runner = CliRunner()
+    manifests = []
+    for shard in ("1/2", "2/2"):
+        output_dir = tmp_path / f"shard-{shard[0]}"
+        result = runner.invoke(
+            fleet,
+            [*inputs, str(output_dir), "--from", "2021-01-01", "--to", "2021-01-02"]
+            + ["--seed", "3", "--shard", shard],
+        )
+        assert result.exit_code == 0, result.exception
+        manifests.append(output_dir / f"manifest-{shard[0]}-of-2.json")
+    return manifests
+
+
+def test_merge(sharded_fleet: list[pathlib.Path], tmp_path: pathlib.Path):
+    merged = shards.merge_manifests(sharded_fleet, tmp_path / "merged")
+    assert merged.shard is None
+    assert merged.seed == 3
+    assert sorted(nmi for file in merged.files for nmi in file.nmis) == NMIS
+    manifest = json.loads((tmp_path / "merged" / "manifest.json").read_text())
+    assert {file["path"].split("/")[-1] for file in manifest["files"]} == {
+        f"{n}.xml" for n in NMIS
+    }
+    for file in merged.files:
+        assert (tmp_path / "merged" / file.path).is_file()
+
+
+def test_merge_detects_problems(sharded_fleet: list[pathlib.Path]):
+    with pytest.raises(shards.ManifestError) as e:
+        shards.merge_manifests(sharded_fleet[:1], sharded_fleet[0].parent / "merged")
+    assert e.value.problems == ["Missing shard(s) 2 of 2"]
+
+    output = next(sharded_fleet[1].parent.glob("*.xml"))
+    output.write_bytes(output.read_bytes().replace(b"<Market>NEM", b"<Market>WEM"))
+    with pytest.raises(shards.ManifestError) as e:
+        shards.merge_manifests(sharded_fleet, sharded_fleet[0].parent / "merged")
+    assert e.value.problems == [f"{output}: checksum does not match manifest"]
+
+
+def test_merge_repacks(sharded_fleet: list[pathlib.Path], tmp_path: pathlib.Path):
+    single = next(sharded_fleet[0].parent.glob("*.xml")).stat().st_size
+    max_bytes = single * 3
+    output_dir = tmp_path / "repacked"
+    runner = CliRunner()
+    result = runner.invoke(
+        merge, [*map(str, sharded_fleet), str(output_dir), "--max-bytes", str(max_bytes)]
+    )
+    assert result.exit_code == 0, result.exception
+    assert "Merged 2 shard(s): 12 NMI(s)" in result.output
+
+    merged = shards.Manifest.read(output_dir / "manifest.json")
+    assert sorted(nmi for file in merged.files for nmi in file.nmis) == NMIS
+    assert 4 <= len(merged.files) < 12
+    transaction_ids = set()
+    for file in merged.files:
+        path = output_dir / file.path
+        assert path.stat().st_size <= max_bytes
+        with open(path, "rb") as message:
+            assert list(validate(message)) == []
+        transaction = etree.parse(path).find(".//Transaction")
+        assert transaction is not None
+        transaction_ids.add(transaction.get("transactionID"))
+    assert len(transaction_ids) == len(merged.files)
+
+
+def test_fleet_shard_requires_seed(tmp_path: pathlib.Path):
+    path = tmp_path / "nmi-discovery.xml"
+    path.write_text(NMI_DISCOVERY)
+    result = CliRunner().invoke(fleet, [str(path), str(tmp_path / "out"), "--shard", "1/2"])
+    assert result.exit_code == 2
+    assert "--shard requires --seed" in result.output
@@ -0,0 +1,98 @@
+import datetime
+import pathlib
+import time
+
+import pytest
+
+from nem12_tools.generators import nem12, spool
+from nem12_tools.parsers.nmid import Meter, MeterPoint, Register
+from nem12_tools.validators.nem12 import validate
+
+METER_POINTS = [
+    MeterPoint(
+        nmi=nmi,
+        role_mdp="ACTIVMDP",
+        role_frmp="ENERGEX",
+        meters=[
+            Meter(
+                serial_number="701226207",
+                registers=[Register(register_id="E1", uom="KWH", suffix="E1")],
+            )
+        ],
+    )
+    for nmi in ("4102335210", "4102335211")
+]
+DAY = datetime.date(2024, 1, 1)
+
+
+def test_emit_count(tmp_path: pathlib.Path):
+    stats = spool.emit(
+        METER_POINTS, tmp_path, DAY, DAY, nem12.IntervalLength.THIRTY_MINUTES, count=3
+    )
+    assert stats.files == 3
+    assert stats.lag == 0
+    names = sorted(path.name for path in tmp_path.iterdir())
+    assert names == [
+        "nem12_4102335210_00000000.xml",
+        "nem12_4102335210_00000002.xml",
+        "nem12_4102335211_00000001.xml",
+    ]
+    assert stats.bytes == sum(path.stat().st_size for path in tmp_path.iterdir())
+    with open(tmp_path / names[0], "rb") as output:
+        assert list(validate(output)) == []
+
+
+def test_emit_is_rate_limited(tmp_path: pathlib.Path):
+    reports: list[spool.EmitStats] = []
+    stats = spool.emit(
+        METER_POINTS,
+        tmp_path,
+        DAY,
+        DAY,
+        nem12.IntervalLength.THIRTY_MINUTES,
+        files_per_second=20,
+        count=5,
+        report=reports.append,
+        report_every=0,
+    )
+    assert stats.files == 5
+    # Four gaps of 50ms between five files.
+    assert stats.elapsed >= 0.2
+    assert 18 <= stats.files_per_second <= 20
+    assert len(reports) == 5
+
+
+def test_emit_duration(tmp_path: pathlib.Path):
+    stats = spool.emit(
+        METER_POINTS,
+        tmp_path,
+        DAY,
+        DAY,
+        nem12.IntervalLength.THIRTY_MINUTES,
+        files_per_second=10,
+        duration=0.25,
+    )
+    assert 1 <= stats.files <= 4
+    assert not list(tmp_path.glob(".*.tmp"))
+
+
+def test_emit_duration_with_slow_writes(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch):
+    write_atomic = spool._write_atomic
+
+    def slow_write(spool_dir: pathlib.Path, name: str, content: bytes) -> None:
+        time.sleep(0.05)
+        write_atomic(spool_dir, name, content)
+
+    # Unpaced and slower to write than to generate, so the queue is never empty.
+    monkeypatch.setattr(spool, "_write_atomic", slow_write)
+    began = time.monotonic()
+    stats = spool.emit(
+        METER_POINTS, tmp_path, DAY, DAY, nem12.IntervalLength.THIRTY_MINUTES, duration=0.3
+    )
+    assert time.monotonic() - began < 1
+    assert 1 <= stats.files <= 7
+
+
+def test_emit_requires_a_limit(tmp_path: pathlib.Path):
+    with pytest.raises(ValueError):
+        spool.emit(METER_POINTS, tmp_path, DAY, DAY)
@@ -0,0 +1,187 @@
+import datetime
+import pathlib
+import sqlite3
+
+import pytest
+
+from nem12_tools.generators import nem12, sqlite
+from nem12_tools.parsers.nmid import Meter, MeterPoint, Register
+
+NOW = datetime.datetime(2024, 9, 3, 12, 34, 56)
+
+
+@pytest.fixture
+def meter_point() -> MeterPoint:
+    return MeterPoint(
+        nmi="4102335210",
+        role_mdp="ACTIVMDP",
+        role_frmp="ENERGEX",
+        meters=[
+            Meter(
+                serial_number="701226207",
+                registers=[
+                    Register(register_id="E1", uom="KWH", suffix="E1"),
+                    Register(register_id="B1", uom="KWH", suffix="B1"),
+                ],
+            )
+        ],
+    )
+
+
+def _produce(meter_point: MeterPoint, seed: int = 1) -> nem12.Nem12Data:
+    return nem12.produce_nem12_data(
+        meter_point,
+        datetime.date(2024, 1, 1),
+        datetime.date(2024, 1, 3),
+        nem12.IntervalLength.THIRTY_MINUTES,
+        NOW,
+        seed=seed,
+    )
+
+
+def test_normalised(tmp_path: pathlib.Path, meter_point: MeterPoint):
+    data = _produce(meter_point)
+    with sqlite.SqliteSink(tmp_path / "reads.db") as sink:
+        sink.write(data)
+
+    with sqlite3.connect(tmp_path / "reads.db") as connection:
+        details = connection.execute(
+            "SELECT id, nmi, register_suffix, interval_length FROM nmi_details ORDER BY id"
+        ).fetchall()
+        assert [row[1:] for row in details] == [("4102335210", "E1", 30), ("4102335210", "B1", 30)]
+        for (details_id, *_), (_, block) in zip(details, data.read_data, strict=True):
+            reads = connection.execute(
+                "SELECT read_value FROM interval_reads WHERE nmi_details_id = ?"
+                " ORDER BY read_date, interval",
+                (details_id,),
+            ).fetchall()
+            assert [read for (read,) in reads] == list(block.values)
+        assert connection.execute(
+            "SELECT read_date, interval, quality_method FROM interval_reads"
+            " ORDER BY read_date DESC, interval DESC LIMIT 1"
+        ).fetchone() == ("2024-01-03", 48, "A")
+
+
+def test_wide(tmp_path: pathlib.Path, meter_point: MeterPoint):
+    data = _produce(meter_point)
+    with sqlite.SqliteSink(tmp_path / "reads.db", sqlite.Layout.WIDE) as sink:
+        sink.write(data)
+
+    with sqlite3.connect(tmp_path / "reads.db") as connection:
+        rows = connection.execute(
+            "SELECT register_suffix, read_date, read_values FROM interval_days"
+            " JOIN nmi_details ON nmi_details.id = nmi_details_id"
+            " WHERE register_suffix = 'E1' ORDER BY read_date"
+        ).fetchall()
+        assert connection.execute("SELECT COUNT(*) FROM interval_reads").fetchone() == (0,)
+    _, block = data.read_data[0]
+    assert [read_date for _, read_date, _ in rows] == ["2024-01-01", "2024-01-02", "2024-01-03"]
+    for day, (_, _, read_values) in enumerate(rows):
+        assert sqlite.decode_reads(read_values) == block.day_reads(day)
+
+
+def test_rewrite_replaces_reads(tmp_path: pathlib.Path, meter_point: MeterPoint):
+    path = tmp_path / "reads.db"
+    with sqlite.SqliteSink(path, rows_per_transaction=10) as sink:
+        sink.write(_produce(meter_point, seed=1))
+    replacement = _produce(meter_point, seed=2)
+    with sqlite.SqliteSink(path) as sink:
+        sink.write(replacement)
+
+    with sqlite3.connect(path) as connection:
+        assert connection.execute("SELECT COUNT(*) FROM nmi_details").fetchone() == (2,)
+        reads = connection.execute(
+            "SELECT read_value FROM interval_reads JOIN nmi_details ON nmi_details.id ="
+            " nmi_details_id WHERE register_suffix = 'E1' ORDER BY read_date, interval"
+        ).fetchall()
+    assert [read for (read,) in reads] == list(replacement.read_data[0][1].values)
+
+
+def _produce_range(
+    meter_point: MeterPoint,
+    start: datetime.date,
+    end: datetime.date,
+    interval: nem12.IntervalLength = nem12.IntervalLength.THIRTY_MINUTES,
+    seed: int = 1,
+) -> nem12.Nem12Data:
+    return nem12.produce_nem12_data(meter_point, start, end, interval, NOW, seed=seed)
+
+
+def test_successive_ranges_are_kept(tmp_path: pathlib.Path, meter_point: MeterPoint):
+    path = tmp_path / "reads.db"
+    january = _produce_range(meter_point, datetime.date(2024, 1, 30), datetime.date(2024, 1, 31))
+    february = _produce_range(meter_point, datetime.date(2024, 2, 1), datetime.date(2024, 2, 2))
+    with sqlite.SqliteSink(path) as sink:
+        sink.write(january)
+    with sqlite.SqliteSink(path) as sink:
+        sink.write(february)
+
+    with sqlite3.connect(path) as connection:
+        reads = connection.execute(
+            "SELECT read_value FROM interval_reads JOIN nmi_details ON nmi_details.id ="
+            " nmi_details_id WHERE register_suffix = 'E1' ORDER BY read_date, interval"
+        ).fetchall()
+    assert [read for (read,) in reads] == [
+        *january.read_data[0][1].values,
+        *february.read_data[0][1].values,
+    ]
+
+
+def test_rewrite_removes_stale_reads(tmp_path: pathlib.Path, meter_point: MeterPoint):
+    path = tmp_path / "reads.db"
+    with sqlite.SqliteSink(path) as sink:
+        sink.write(
+            _produce_range(
+                meter_point,
+                datetime.date(2024, 1, 1),
+                datetime.date(2024, 1, 3),
+                nem12.IntervalLength.FIVE_MINUTES,
+            )
+        )
+    # A new interval length clears every earlier day, not only the dates rewritten.
+    with sqlite.SqliteSink(path, sqlite.Layout.WIDE) as sink:
+        sink.write(
+            _produce_range(meter_point, datetime.date(2024, 1, 2), datetime.date(2024, 1, 3))
+        )
+
+    with sqlite3.connect(path) as connection:
+        assert connection.execute("SELECT COUNT(*) FROM interval_reads").fetchone() == (0,)
+        assert connection.execute(
+            "SELECT DISTINCT read_date FROM interval_days ORDER BY read_date"
+        ).fetchall() == [("2024-01-02",), ("2024-01-03",)]
+
+    # Rewriting a date in the other layout replaces that day in both tables.
+    replacement = _produce_range(
+        meter_point, datetime.date(2024, 1, 2), datetime.date(2024, 1, 2), seed=2
+    )
+    with sqlite.SqliteSink(path) as sink:
+        sink.write(replacement)
+
+    with sqlite3.connect(path) as connection:
+        assert connection.execute(
+            "SELECT DISTINCT read_date FROM interval_days ORDER BY read_date"
+        ).fetchall() == [("2024-01-03",)]
+        rows = connection.execute(
+            "SELECT read_date, interval, read_value FROM interval_reads JOIN nmi_details"
+            " ON nmi_details.id = nmi_details_id WHERE register_suffix = 'E1'"
+            " ORDER BY read_date, interval"
+        ).fetchall()
+    assert [(read_date, interval) for read_date, interval, _ in rows] == [
+        ("2024-01-02", interval) for interval in range(1, 49)
+    ]
+    assert [read for _, _, read in rows] == list(replacement.read_data[0][1].values)
+
+
+def test_generate_nem12_writes_sinks(tmp_path: pathlib.Path, meter_point: MeterPoint):
+    with sqlite.SqliteSink(tmp_path / "reads.db") as sink:
+        notification = nem12.generate_nem12(
+            meter_point,
+            datetime.date(2024, 1, 1),
+            datetime.date(2024, 1, 1),
+            nem12.IntervalLength.THIRTY_MINUTES,
+            seed=1,
+            sinks=[sink],
+        )
+    assert notification.tree is not None
+    with sqlite3.connect(tmp_path / "reads.db") as connection:
+        assert connection.execute("SELECT COUNT(*) FROM interval_reads").fetchone() == (96,)
@@ -0,0 +1,109 @@
+import datetime
+from io import BytesIO
+
+from nem12_tools.generators import nem12
+from nem12_tools.parsers.nmid import Meter, MeterPoint, Register
+from nem12_tools.validators.nem12 import Violation, validate
+
+READS_5 = ",".join(["0.1000"] * 288)
+
+
+def _csv(*rows: str) -> BytesIO:
+    return BytesIO("".join(f"{row}\n" for row in rows).encode())
+
+
+def test_generated_file_is_valid():
+    m = MeterPoint(
+        nmi="4102335210",
+        role_mdp="ACTIVMDP",
+        role_frmp="ENERGEX",
+        meters=[
+            Meter(
+                serial_number="701226207",
+                registers=[
+                    Register(register_id="E1", uom="KWH", suffix="E1"),
+                    Register(register_id="B1", uom="KWH", suffix="B1"),
+                ],
+            )
+        ],
+    )
+    notification = nem12.generate_nem12(
+        m, start=datetime.date(2024, 1, 1), end=datetime.date(2024, 1, 3)
+    )
+    xml_file = BytesIO()
+    notification.tree.write(xml_file, pretty_print=True, xml_declaration=True, encoding="utf-8")
+    xml_file.seek(0)
+    assert list(validate(xml_file)) == []
+
+
+def test_valid_csv():
+    data = _csv(
+        "100,NEM12,202401010000,MDP,FRMP",
+        "200,4102335210,E1B1,E1,E1,,1,KWH,5,",
+        f"300,20240101,{READS_5},A,,,20240101000000,20240101000000",
+        f"300,20240102,{READS_5},A,,,20240101000000,20240101000000",
+        "900",
+    )
+    assert list(validate(data)) == []
+
+
+def test_interval_count_mismatch():
+    data = _csv(
+        "100,NEM12,202401010000,MDP,FRMP",
+        "200,4102335210,E1,E1,E1,,1,KWH,15,",
+        f"300,20240101,{READS_5},A,,,20240101000000,20240101000000",
+        "900",
+    )
+    assert list(validate(data)) == [
+        Violation(3, "300 record must have 96 interval values, found 288")
+    ]
+
+
+def test_configuration_and_date_continuity():
+    data = _csv(
+        "100,NEM12,202401010000,MDP,FRMP",
+        "200,4102335210,E1,E1,B1,,1,KWH,5,",
+        f"300,20240101,{READS_5},A,,,20240101000000,20240101000000",
+        f"300,20240103,{READS_5},A,,,20240101000000,20240101000000",
+        "200,4102335210,E1B1,E1,E1,,1,KWH,5,",
+        "900",
+    )
+    assert list(validate(data)) == [
+        Violation(2, "NMISuffix 'B1' is not in NMIConfiguration 'E1'"),
+        Violation(4, "IntervalDate 20240103 out of sequence, expected 20240102"),
+        Violation(5, "NMIConfiguration 'E1B1' differs from 'E1' for NMI 4102335210"),
+    ]
+
+
+def test_bracketing():
+    data = _csv(
+        "200,4102335210,E1,E1,E1,,1,KWH,5,",
+        "900",
+        "300,20240101",
+    )
+    assert list(validate(data)) == [
+        Violation(1, "File must start with a 100 record"),
+        Violation(3, "300 record after 900 record"),
+    ]
+    missing_end = _csv("100,NEM12,202401010000,MDP,FRMP")
+    assert list(validate(missing_end)) == [Violation(1, "File must end with a 900 record")]
+
+
+def test_asexml_envelope():
+    data = BytesIO(
+        b"<?xml version='1.0' encoding='UTF-8'?>\n"
+        b'<ase:aseXML xmlns:ase="urn:aseXML:r43">\n'
+        b"  <Header><From>MDP</From><To>FRMP</To></Header>\n"
+        b"  <CSVIntervalData>100,NEM12,202401010000,MDP,FRMP\n"
+        b"900\n"
+        b"</CSVIntervalData>\n"
+        b"</ase:aseXML>\n"
+    )
+    violations = list(validate(data))
+    assert violations[0] == Violation(
+        4, "CSVIntervalData is not nested within a Transactions element"
+    )
+    assert Violation(0, "aseXML Header is missing MessageID") in violations
+
+    unclosed = BytesIO(b"<aseXML>\n<CSVIntervalData>100,NEM12,202401010000,MDP,FRMP\n")
+    assert list(validate(unclosed))[-1] == Violation(2, "CSVIntervalData element is not closed")